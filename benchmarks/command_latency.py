@@ -0,0 +1,224 @@
+# ==============================================================================
+# File: benchmarks/command_latency.py
+# Description: Offline end-to-end latency benchmark for AdvancedJARVIS command
+#              processing. Replays recorded transcripts through the real intent
+#              parser and handlers, with local stand-ins for speech I/O and the
+#              OpenWeather/NewsAPI endpoints, so it runs without a network.
+#
+#              Usage: python -m benchmarks.command_latency [--iterations N]
+# ==============================================================================
+import argparse
+import asyncio
+import logging
+import socket
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from core.config import JarvisConfig
+from core.database import DatabaseManager
+from core.jarvis import AdvancedJARVIS
+from services.intent_parser import IntentParser
+from utils.health_monitor import HealthMonitor
+from utils.http_client import HttpClient
+from utils.system_sampler import SystemSampler
+
+DEFAULT_CORPUS = Path(__file__).with_name("transcripts.txt")
+
+class StandInTTSEngine:
+    """Records what would have been spoken, optionally simulating playback time."""
+    def __init__(self, playback_delay: float = 0.0):
+        self.playback_delay = playback_delay
+        self.spoken: List[tuple] = []
+
+    @property
+    def is_speaking(self) -> bool:
+        return False
+
+    def played_during(self, start: float, end: float, tail: float = 0.0) -> bool:
+        return False
+
+    def speak(self, text: str, emotion: str = "professional"):
+        return asyncio.ensure_future(self._play([(text, emotion)]))
+
+    def speak_sequence(self, items):
+        return asyncio.ensure_future(self._play(list(items)))
+
+    async def _play(self, items: list) -> bool:
+        for item in items:
+            self.spoken.append(item)
+            if self.playback_delay:
+                await asyncio.sleep(self.playback_delay)
+        return True
+
+    def stop(self):
+        pass
+
+    async def prewarm(self, phrases):
+        pass
+
+    async def presynthesize(self, text: str, emotion: str = "professional"):
+        pass
+
+    async def close(self):
+        pass
+
+class StandInSpeechRecognizer:
+    """Replays a transcript corpus in place of the microphone."""
+    def __init__(self, transcripts: List[str]):
+        self.transcripts = list(transcripts)
+        self.position = 0
+        self.last_timings = {}
+        self.last_heard = None
+
+    async def initialize(self):
+        pass
+
+    async def listen(self, on_partial=None) -> Optional[str]:
+        # Transcripts arrive whole, so there are no partials to report.
+        if self.position >= len(self.transcripts):
+            return None
+        command = self.transcripts[self.position]
+        self.position += 1
+        return command
+
+    async def close(self):
+        pass
+
+class StandInMediaService:
+    """Keeps search and play_media handlers from opening a browser."""
+    async def play_on_youtube(self, query: str):
+        pass
+
+    async def search_web(self, query: str):
+        pass
+
+def _build_api_app(api_latency: float) -> web.Application:
+    """Serves canned OpenWeather and NewsAPI responses."""
+    async def weather(request: web.Request) -> web.Response:
+        await asyncio.sleep(api_latency)
+        return web.json_response({
+            "name": request.query.get("q", "London").title(),
+            "main": {"temp": 18.4},
+            "weather": [{"description": "scattered clouds"}],
+        })
+
+    async def headlines(request: web.Request) -> web.Response:
+        await asyncio.sleep(api_latency)
+        count = int(request.query.get("pageSize", 3))
+        return web.json_response({
+            "status": "ok",
+            "articles": [{"title": f"Benchmark headline number {i + 1}"} for i in range(count)],
+        })
+
+    app = web.Application()
+    app.router.add_get("/data/2.5/weather", weather)
+    app.router.add_get("/v2/top-headlines", headlines)
+    return app
+
+def load_corpus(path: Path) -> List[str]:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line.strip().lower() for line in lines if line.strip() and not line.startswith("#")]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_benchmark(corpus: List[str], iterations: int, warmup: int,
+                        api_latency: float, playback_delay: float, keep_caches: bool = False) -> Dict[str, List[float]]:
+    runner = web.AppRunner(_build_api_app(api_latency))
+    await runner.setup()
+    # Bind our own socket so the ephemeral port is known without reaching into the site.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    await web.SockSite(runner, sock).start()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = JarvisConfig(
+            api_keys={"openweather": "benchmark", "news": "benchmark"},
+            database_path=str(Path(tmp_dir) / "benchmark.db"),
+        )
+        config.voice_settings.prewarm_cache = False
+        db_manager = DatabaseManager(config.database_path, config.database_settings)
+        http_client = HttpClient(config.http_settings)
+        await http_client.start()
+        sampler = SystemSampler(config.behavior.system_sample_interval, config.behavior.system_sample_window)
+        sampler.start()
+        jarvis = AdvancedJARVIS(
+            config, db_manager, StandInTTSEngine(playback_delay),
+            StandInSpeechRecognizer(corpus * (iterations + warmup)), IntentParser(), HealthMonitor(sampler),
+            http_client,
+        )
+        jarvis.media_service = StandInMediaService()
+        jarvis.weather_service.base_url = f"http://127.0.0.1:{port}/data/2.5/weather"
+        jarvis.news_service.base_url = f"http://127.0.0.1:{port}/v2/top-headlines"
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        try:
+            for i in range(len(corpus) * (iterations + warmup)):
+                command = await jarvis.speech_recognizer.listen()
+                intent, _ = await jarvis.intent_parser.parse(command)
+                # Every command is measured from an awake assistant, like a live session.
+                jarvis.is_active = True
+                if not keep_caches:
+                    # Otherwise the warmup pass leaves every weather and news command a cache hit.
+                    jarvis.weather_cache.clear()
+                    jarvis.headlines = None
+                start = time.perf_counter()
+                await jarvis._process_command(command)
+                elapsed = time.perf_counter() - start
+                if i >= len(corpus) * warmup:
+                    latencies[intent].append(elapsed)
+        finally:
+            await jarvis.shutdown()
+            await http_client.close()
+            sampler.stop()
+            await db_manager.close()
+            await runner.cleanup()
+    return latencies
+
+def format_report(latencies: Dict[str, List[float]]) -> str:
+    header = f"{'intent':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'cmd/s':>10}"
+    lines = [header, "-" * len(header)]
+    rows = sorted(latencies.items())
+    rows.append(("TOTAL", [v for values in latencies.values() for v in values]))
+    for intent, values in rows:
+        ordered = sorted(values)
+        total = sum(ordered)
+        lines.append(
+            f"{intent:<16}{len(ordered):>7}"
+            f"{percentile(ordered, 50) * 1000:>10.3f}"
+            f"{percentile(ordered, 95) * 1000:>10.3f}"
+            f"{percentile(ordered, 99) * 1000:>10.3f}"
+            f"{(len(ordered) / total if total else 0.0):>10.1f}"
+        )
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline JARVIS command latency benchmark.")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Transcript file, one command per line.")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured passes over the corpus.")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured passes over the corpus.")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Simulated API latency in seconds.")
+    parser.add_argument("--playback-delay", type=float, default=0.0, help="Simulated playback time per utterance in seconds.")
+    parser.add_argument("--keep-caches", action="store_true",
+                        help="Keep weather and headline caches between commands, measuring cache hits.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    latencies = asyncio.run(run_benchmark(
+        load_corpus(args.corpus), args.iterations, args.warmup, args.api_latency, args.playback_delay,
+        args.keep_caches,
+    ))
+    print(format_report(latencies))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 # ==============================================================================
 # File: core/config.py
 # ==============================================================================
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
 load_dotenv()
 
 @dataclass
@@ -8,6 +14,15 @@ class VoiceSettings:
     """Voice and TTS related settings."""
     voice: str = os.getenv("ASSISTANT_VOICE", "en-US-AriaNeural")
     emotion_modulation: bool = True
+    audio_cache_enabled: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    audio_cache_dir: str = os.getenv("TTS_CACHE_DIR", "data/tts_cache")
+    audio_cache_max_bytes: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    prewarm_cache: bool = os.getenv("TTS_PREWARM_CACHE", "false").lower() == "true"
+    streaming: bool = os.getenv("TTS_STREAMING", "true").lower() == "true"
+    stream_prebuffer_bytes: int = 6 * 1024  # ~1s of edge-tts 48kbit/s MP3
+    stream_segment_bytes: int = 1536  # ~0.25s; later audio is decoded and queued in pieces this size
+    lookahead: int = 2
+    sentence_split_chars: int = 200
 
 @dataclass
 class SpeechSettings:
@@ -16,6 +31,74 @@ class SpeechSettings:
     pause_threshold: float = 0.8
     phrase_time_limit: int = 10
     timeout: float = 5.0
+    barge_in_requires_wake_word: bool = True
+    # Without the wake word, speech heard this long after JARVIS stopped talking may be its echo.
+    echo_tail_seconds: float = 0.5
+    # Keep one input stream open and cut utterances out of a ring buffer.
+    continuous_capture: bool = os.getenv("SPEECH_CONTINUOUS_CAPTURE", "true").lower() == "true"
+    capture_buffer_seconds: float = 30.0
+    capture_chunk_frames: int = 1024
+    capture_pre_roll: float = 0.5
+    # Blocking ambient-noise calibration at startup; 0 skips it.
+    calibration_seconds: float = float(os.getenv("SPEECH_CALIBRATION_SECONDS", "0.5"))
+    # Keep adjusting energy_threshold from the captured audio (continuous capture only).
+    adaptive_noise: bool = os.getenv("SPEECH_ADAPTIVE_NOISE", "true").lower() == "true"
+    noise_window_seconds: float = 5.0
+    noise_ema_alpha: float = 0.3
+    # The adaptive threshold never drops below this, however quiet the room gets.
+    min_energy_threshold: float = float(os.getenv("SPEECH_MIN_ENERGY_THRESHOLD", "50"))
+    # Drop coughs, hum and silence before they reach the recognizer.
+    vad_enabled: bool = os.getenv("SPEECH_VAD_ENABLED", "true").lower() == "true"
+    # "google", "vosk" (offline, needs VOSK_MODEL_PATH) or "stub" (scripted transcripts).
+    backend: str = os.getenv("SPEECH_BACKEND", "google").lower()
+    language: str = os.getenv("SPEECH_LANGUAGE", "en-US")
+    vosk_model_path: str = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15")
+    stub_transcripts_file: Optional[str] = os.getenv("SPEECH_STUB_TRANSCRIPTS") or None
+    stub_latency: float = 0.0
+    # Capture the next utterance while the previous one is being recognized.
+    pipeline: bool = os.getenv("SPEECH_PIPELINE", "true").lower() == "true"
+    pipeline_queue_size: int = 2
+    # Pass on partial transcripts from backends that stream them (needs continuous capture).
+    partial_results: bool = os.getenv("SPEECH_PARTIAL_RESULTS", "true").lower() == "true"
+    # Read speech from a mono WAV file instead of the microphone.
+    audio_file: Optional[str] = os.getenv("SPEECH_AUDIO_FILE") or None
+    audio_file_realtime: bool = os.getenv("SPEECH_AUDIO_FILE_REALTIME", "true").lower() == "true"
+
+@dataclass
+class HttpSettings:
+    """Shared HTTP client settings for external services."""
+    pool_size: int = 20
+    per_host_limit: int = 4
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30.0
+    connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+    read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", "5"))
+    total_timeout: float = 10.0
+    # Longest a request waits for its API's rate limiter before failing instead.
+    rate_limit_max_wait: float = 2.0
+
+@dataclass
+class DatabaseSettings:
+    """SQLite durability and write-batching settings."""
+    journal_mode: str = "WAL"
+    synchronous: str = os.getenv("DATABASE_SYNCHRONOUS", "NORMAL")
+    write_batch_size: int = 256
+    write_flush_interval: float = 0.5
+    reader_pool_size: int = 4
+    migration_batch_size: int = 5000
+    semantic_recall: bool = os.getenv("SEMANTIC_RECALL", "false").lower() == "true"
+    semantic_min_score: float = 0.2
+
+@dataclass
+class TracingSettings:
+    """Per-command stage tracing."""
+    enabled: bool = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+    sample_rate: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    path: str = os.getenv("TRACE_PATH", "logs/traces.jsonl")
+    # Commands are what the user said; traces only record their length unless this is on.
+    include_command_text: bool = os.getenv("TRACE_INCLUDE_COMMAND_TEXT", "false").lower() == "true"
+    max_bytes: int = 10 * 1024 * 1024
+    backup_count: int = 5
 
 @dataclass
 class BehaviorSettings:
@@ -23,7 +106,29 @@ class BehaviorSettings:
     auto_sleep_timeout: int = 300
     context_memory_size: int = 20
     health_check_interval: int = 60
+    system_sample_interval: float = float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "1.0"))
+    system_sample_window: int = int(os.getenv("SYSTEM_SAMPLE_WINDOW", "60"))
     metrics_interval: int = 300
+    weather_cache_ttl: int = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+    weather_max_stale: int = 6 * 3600
+    # 72 prefetches a day, inside the budget below minus its reserve for live requests.
+    news_refresh_interval: int = int(os.getenv("NEWS_REFRESH_INTERVAL", "1200"))
+    news_refresh_jitter: float = 0.1
+    news_max_age: int = 1800
+    # Every NewsAPI call, prefetched or live, spends from this one daily budget (the free tier allows 100).
+    news_daily_request_budget: int = int(os.getenv("NEWS_DAILY_REQUEST_BUDGET", "100"))
+    news_prefetch_reserve: int = 20
+    # Seconds a command may keep the user waiting; time spent speaking is not counted.
+    command_deadline: float = float(os.getenv("COMMAND_DEADLINE", "6"))
+    intent_deadlines: Dict[str, float] = field(default_factory=lambda: {
+        "time_query": 2.0, "date_query": 2.0, "joke_request": 3.0,
+        "weather_query": 5.0, "news_query": 8.0,
+    })
+    # Start fetching and synthesizing a response once a partial transcript's intent settles.
+    speculative_intents: bool = os.getenv("SPECULATIVE_INTENTS", "true").lower() == "true"
+    speculation_settle_time: float = 0.3
+    # Commands heard while another one is still being handled wait their turn in this queue.
+    command_queue_size: int = 3
 
 @dataclass
 class JarvisConfig:
@@ -31,12 +136,20 @@ class JarvisConfig:
     voice_settings: VoiceSettings = field(default_factory=VoiceSettings)
     speech_settings: SpeechSettings = field(default_factory=SpeechSettings)
     behavior: BehaviorSettings = field(default_factory=BehaviorSettings)
+    http_settings: HttpSettings = field(default_factory=HttpSettings)
+    database_settings: DatabaseSettings = field(default_factory=DatabaseSettings)
+    tracing: TracingSettings = field(default_factory=TracingSettings)
     
     api_keys: Dict[str, str] = field(default_factory=lambda: {
         "openweather": os.getenv("OPENWEATHER_API_KEY"),
         "news": os.getenv("NEWS_API_KEY"),
     })
     
+    # Per-API quotas as (max calls, time window in seconds), each API key gets its own bucket.
+    api_rate_limits: Dict[str, Tuple[int, float]] = field(default_factory=lambda: {
+        "openweather": (60, 60),
+    })
+    
     wake_words: List[str] = field(default_factory=lambda: 
         [w.strip() for w in os.getenv("ASSISTANT_WAKE_WORDS", "jarvis").split(',')]
     )
@@ -45,6 +158,8 @@ class JarvisConfig:
     database_path: str = os.getenv("DATABASE_PATH", "data/jarvis_memory.db")
 
     def __post_init__(self):
+        # News has a single daily budget, shared by the prefetch loop and live requests.
+        self.api_rate_limits.setdefault("news", (self.behavior.news_daily_request_budget, 86400))
         if not self.api_keys["openweather"]:
             print("Warning: OPENWEATHER_API_KEY is not set. Weather features will be disabled.")
         if not self.api_keys["news"]:
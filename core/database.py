@@ -1,62 +1,318 @@
 # ==============================================================================
 # File: core/database.py
 # ==============================================================================
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from core.config import DatabaseSettings
+from core.exceptions import DatabaseError
+from core.migrations import migrate
+from core.vector_index import VectorIndex
+from utils.deadline import within_deadline
+
+# Column weights for bm25(): content matches count most, then category, then tags.
+BM25_WEIGHTS = "10.0, 4.0, 2.0"
+
+class ExecutorStats:
+    """Queue depth and queue wait time for one database executor."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.tasks = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def enqueued(self):
+        with self._lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def started(self, wait: float):
+        with self._lock:
+            self.queue_depth -= 1
+            self.tasks += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "tasks": self.tasks,
+                "avg_wait": self.total_wait / self.tasks if self.tasks else 0.0,
+                "max_wait": self.max_wait,
+            }
+
 class DatabaseManager:
     """Manages SQLite database operations."""
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, settings: Optional[DatabaseSettings] = None):
         from pathlib import Path
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        # Note: For a truly async app, a library like aiosqlite would be ideal.
-        # Here, we use run_in_executor to handle blocking calls.
+        self.settings = settings or DatabaseSettings()
+        # The database has its own threads, so queries never queue behind microphone
+        # or media work in the loop's default executor. All writes go through a single
+        # writer thread and connection; reads use a pool of read-only WAL connections.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-db-writer")
+        self._readers = ThreadPoolExecutor(
+            max_workers=self.settings.reader_pool_size, thread_name_prefix="jarvis-db-reader"
+        )
+        self._reader_local = threading.local()
+        self._reader_conns = []
+        self._reader_conns_lock = threading.Lock()
+        self.executor_stats = {"writer": ExecutorStats(), "reader": ExecutorStats()}
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA journal_mode={self.settings.journal_mode}")
+        self.conn.execute(f"PRAGMA synchronous={self.settings.synchronous}")
         self._setup_tables()
+        self.vector_index: Optional[VectorIndex] = None
+        if self.settings.semantic_recall:
+            self._open_vector_index()
+        # Write-behind queue: memories are inserted in batched transactions.
+        self._pending_memories = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
 
     def _setup_tables(self):
         # This is a blocking call, but it's only done once at startup.
-        cursor = self.conn.cursor()
-        # CRITICAL FIX: Create the 'memories' table before the virtual FTS table.
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS memories (
-                id INTEGER PRIMARY KEY,
-                content TEXT NOT NULL,
-                category TEXT,
-                tags TEXT
-            );
-        """)
-        cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
-                content, category, tags, content='memories', content_rowid='id'
-            );
-        """)
-        self.conn.commit()
+        try:
+            migrate(self.conn, self.settings.migration_batch_size, self._log_migration_progress)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Database migration failed: {e}") from e
+
+    def _open_vector_index(self):
+        try:
+            self.vector_index = VectorIndex(self.db_path.with_suffix(".vectors"))
+        except ImportError as e:
+            logging.warning(f"Semantic memory recall disabled: {e}")
+            return
+        # Index anything stored while semantic recall was off, then catch up on edits and
+        # deletions. Submitted first, so it runs on the writer thread before any new write.
+        self._writer.submit(self._backfill_vector_index_blocking)
+        self._writer.submit(self._sync_vector_index_blocking)
 
-    async def _execute_in_executor(self, func, *args):
-        """Runs a blocking database function in a thread pool."""
+    def _backfill_vector_index_blocking(self):
+        batch_size = self.settings.migration_batch_size
+        while True:
+            rows = self.conn.execute(
+                "SELECT id, content FROM memories WHERE id > ? ORDER BY id LIMIT ?",
+                (self.vector_index.max_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            self.vector_index.add([row["id"] for row in rows], [row["content"] for row in rows])
+            logging.info(f"Vector index backfilled up to memory {self.vector_index.max_id}.")
+
+    def _sync_vector_index_blocking(self):
+        """Re-embeds memories whose text changed and drops deleted ones, from the change log."""
+        batch_size = self.settings.migration_batch_size
+        while True:
+            changed = [row[0] for row in self.conn.execute(
+                "SELECT id FROM memory_vector_changes ORDER BY id LIMIT ?", (batch_size,)
+            )]
+            if not changed:
+                return
+            marks = ", ".join("?" for _ in changed)
+            rows = self.conn.execute(f"SELECT id, content FROM memories WHERE id IN ({marks})", changed).fetchall()
+            self.vector_index.remove(changed)
+            self.vector_index.add([row["id"] for row in rows], [row["content"] for row in rows])
+            with self.conn:
+                self.conn.execute(f"DELETE FROM memory_vector_changes WHERE id IN ({marks})", changed)
+
+    @staticmethod
+    def _log_migration_progress(step: str, done: int, total: int):
+        logging.info(f"Migrating {step}: {done}/{total} rows.")
+
+    async def _execute_in_executor(self, func, *args, read_only: bool = False):
+        """Runs a blocking database function on the writer thread or the reader pool."""
+        executor = self._readers if read_only else self._writer
+        stats = self.executor_stats["reader" if read_only else "writer"]
+        submitted = time.perf_counter()
+
+        def run():
+            stats.started(time.perf_counter() - submitted)
+            return func(*args)
+
+        stats.enqueued()
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, func, *args)
-
-    def _store_memory_blocking(self, content: str, category: str, tags: list):
-        # This is the blocking function to be run in an executor
-        tags_json = json.dumps(tags or [])
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT INTO memories (content, category, tags) VALUES (?, ?, ?)",
-                       (content, category, tags_json))
-        self.conn.commit()
+        future = loop.run_in_executor(executor, run)
+        if read_only:
+            return await within_deadline(future, "database.read")
+        # A write cannot be taken back once its thread has it, so writes never time out.
+        return await future
+
+    def _reader_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._reader_local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._reader_local.conn = conn
+            with self._reader_conns_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def pool_stats(self) -> dict:
+        """Queue depth and wait time of the writer thread and the reader pool."""
+        return {name: stats.snapshot() for name, stats in self.executor_stats.items()}
+
+    def _store_memories_blocking(self, rows: list):
+        # One transaction, and so one fsync, per batch.
+        ids = []
+        with self.conn:
+            for row in rows:
+                ids.append(self.conn.execute(
+                    "INSERT INTO memories (content, category, tags, created_at) VALUES (?, ?, ?, ?)", row
+                ).lastrowid)
+        if self.vector_index is not None:
+            self.vector_index.add(ids, [row[0] for row in rows])
+            # A new row may reuse the id of a deleted one, whose old vector goes now.
+            self._sync_vector_index_blocking()
 
     async def store_memory(self, content: str, category: str, tags: list):
-        await self._execute_in_executor(self._store_memory_blocking, content, category, tags)
+        """Queues a memory; it is written once the batch fills or the flush interval passes."""
+        self._pending_memories.append((content, category, json.dumps(tags or []), datetime.now().isoformat()))
+        if len(self._pending_memories) >= self.settings.write_batch_size:
+            await self.flush()
+        elif self._flush_timer is None:
+            loop = asyncio.get_running_loop()
+            self._flush_timer = loop.call_later(self.settings.write_flush_interval, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_timer = None
+        self._flush_task = asyncio.create_task(self._flush_in_background())
+
+    async def _flush_in_background(self):
+        try:
+            await self.flush()
+        except DatabaseError as e:
+            logging.error(e)
+
+    async def flush(self):
+        """Writes every queued memory to disk."""
+        async with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_memories:
+                return
+            batch, self._pending_memories = self._pending_memories, []
+            try:
+                await self._execute_in_executor(self._store_memories_blocking, batch)
+            except sqlite3.Error as e:
+                # Keep the rows queued so a later flush can retry them.
+                self._pending_memories[:0] = batch
+                raise DatabaseError(f"Failed to write {len(batch)} memories: {e}") from e
+
+    @staticmethod
+    def _to_fts_query(query: str) -> str:
+        # Quote each term so user text can never be parsed as FTS5 query syntax.
+        terms = re.findall(r"\w+", query.lower())
+        return " OR ".join(f'"{term}"*' for term in terms)
 
-    def _recall_memories_blocking(self, query: str):
-        cursor = self.conn.cursor()
-        # Simple search for demonstration; FTS would be better
-        cursor.execute("SELECT * FROM memories WHERE content LIKE ?", (f'%{query}%',))
+    def _recall_memories_blocking(self, query: str, limit: int, offset: int, with_snippets: bool):
+        fts_query = self._to_fts_query(query)
+        if not fts_query:
+            return []
+        snippet = ", snippet(memories_fts, 0, '[', ']', '...', 12) AS snippet" if with_snippets else ""
+        cursor = self._reader_conn().cursor()
+        cursor.execute(f"""
+            SELECT m.id, m.content, m.category, m.tags, m.created_at,
+                   bm25(memories_fts, {BM25_WEIGHTS}) AS rank{snippet}
+            FROM memories_fts
+            JOIN memories m ON m.id = memories_fts.rowid
+            WHERE memories_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """, (fts_query, limit, offset))
         return cursor.fetchall()
 
-    async def recall_memories(self, query: str):
-        return await self._execute_in_executor(self._recall_memories_blocking, query)
+    def _semantic_recall_blocking(self, query: str, limit: int, offset: int):
+        hits = self.vector_index.search(query, limit + offset, self.settings.semantic_min_score)[offset:]
+        if not hits:
+            return []
+        values = ", ".join("(?, ?)" for _ in hits)
+        params = [value for hit in hits for value in hit]
+        cursor = self._reader_conn().cursor()
+        cursor.execute(f"""
+            WITH hits(id, score) AS (VALUES {values})
+            SELECT m.id, m.content, m.category, m.tags, m.created_at, hits.score AS score
+            FROM hits
+            JOIN memories m ON m.id = hits.id
+            ORDER BY hits.score DESC
+        """, params)
+        return cursor.fetchall()
+
+    async def recall_memories(self, query: str, limit: int = 10, offset: int = 0, with_snippets: bool = False,
+                              semantic: bool = False):
+        """Full-text recall ranked by bm25 over content, category and tags, one page at a time.
+
+        With semantic=True, memories are ranked by embedding similarity instead, which also
+        finds near matches that share no exact word with the query.
+        """
+        # A flush in flight has already taken its batch off the queue, so wait for it too.
+        if self._pending_memories or self._flush_lock.locked():
+            await self.flush()
+        if semantic:
+            if self.vector_index is None:
+                raise DatabaseError("Semantic recall is not enabled.")
+            # Memories may have been edited or deleted since the index last caught up.
+            await self._execute_in_executor(self._sync_vector_index_blocking)
+            return await self._execute_in_executor(
+                self._semantic_recall_blocking, query, limit, offset, read_only=True
+            )
+        return await self._execute_in_executor(
+            self._recall_memories_blocking, query, limit, offset, with_snippets, read_only=True
+        )
+
+    def _get_preference_blocking(self, key: str) -> Optional[str]:
+        row = self._reader_conn().execute("SELECT value FROM user_preferences WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    async def get_preference(self, key: str) -> Optional[str]:
+        return await self._execute_in_executor(self._get_preference_blocking, key, read_only=True)
+
+    def _set_preference_blocking(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO user_preferences (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    async def set_preference(self, key: str, value: str):
+        await self._execute_in_executor(self._set_preference_blocking, key, value)
+
+    def _rebuild_search_index_blocking(self):
+        self.conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+        self.conn.commit()
+        logging.info("Memory search index rebuilt.")
+
+    async def rebuild_search_index(self):
+        await self._execute_in_executor(self._rebuild_search_index_blocking)
+
+    def _close_readers_blocking(self):
+        self._readers.shutdown(wait=True)
+        with self._reader_conns_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
 
     async def close(self):
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._close_readers_blocking)
         await self._execute_in_executor(self.conn.close)
+        self._writer.shutdown(wait=False)
         logging.info("Database connection closed.")
@@ -25,3 +25,7 @@ class TTSError(JarvisError):
 class CircuitBreakerOpenError(JarvisError):
     """Raised when circuit breaker is open."""
     pass
+
+class DeadlineExceededError(JarvisError):
+    """Raised when a stage runs past the current command's deadline."""
+    pass
@@ -1,28 +1,79 @@
+# ==============================================================================
+# File: core/jarvis.py
+# ==============================================================================
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional, Tuple
+
+import pyjokes
+
+from core.config import JarvisConfig
+from core.database import DatabaseManager
+from core.exceptions import CircuitBreakerOpenError, DeadlineExceededError, ServiceUnavailableError
+from services.conversation_service import ConversationService
+from services.intent_parser import IncrementalIntent, IntentParser
+from services.media_service import MediaService
+from services.news_service import NewsService
+from services.speech_recognizer import SpeechRecognizer
+from services.system_service import SystemService
+from services.tts_engine import TTSEngine
+from services.weather_service import WeatherService
+from utils.circuit_breaker import CircuitBreaker
+from utils.deadline import deadline_scope, no_deadline, within_deadline
+from utils.health_monitor import HealthMonitor
+from utils.http_client import HttpClient
+from utils.metrics_collector import MetricsCollector
+from utils.rate_limiter import RateLimiter
+from utils.single_flight import SingleFlight
+from utils.speculation import Speculation
+from utils.tracing import Trace, Tracer, no_trace, span
+from utils.ttl_cache import CacheEntry, TTLCache
+
 class AdvancedJARVIS:
     """Enhanced JARVIS AI assistant orchestrator."""
     def __init__(self, config: JarvisConfig, db_manager: DatabaseManager, tts_engine: TTSEngine, 
-                 speech_recognizer: SpeechRecognizer, intent_parser: IntentParser, health_monitor: HealthMonitor):
+                 speech_recognizer: SpeechRecognizer, intent_parser: IntentParser, health_monitor: HealthMonitor,
+                 http_client: HttpClient):
         self.config = config
         self.db_manager = db_manager
         self.tts_engine = tts_engine
         self.speech_recognizer = speech_recognizer
         self.intent_parser = intent_parser
         self.health_monitor = health_monitor
+        self.http_client = http_client
         self.is_active = False
         self.is_running = True
         self.last_activity_time = time.time()
         self.conversation_service = ConversationService(config)
         self.metrics = MetricsCollector()
+        self.tracer = Tracer(config.tracing)
         
-        self.weather_service = WeatherService(config.api_keys.get("openweather"))
-        self.news_service = NewsService(config.api_keys.get("news"))
+        max_wait = config.http_settings.rate_limit_max_wait
+        self.api_rate_limiter = RateLimiter(*config.api_rate_limits["openweather"])
+        self.weather_service = WeatherService(config.api_keys.get("openweather"), http_client, self.api_rate_limiter, max_wait)
+        self.news_service = NewsService(config.api_keys.get("news"), http_client, self.api_rate_limiter, max_wait)
+        for service, api in ((self.weather_service, "openweather"), (self.news_service, "news")):
+            self.api_rate_limiter.set_limit(service.rate_limit_key, *config.api_rate_limits[api])
         self.media_service = MediaService()
-        self.system_service = SystemService()
+        self.system_service = SystemService(health_monitor.sampler)
         
         self.circuit_breakers = {
             "weather": CircuitBreaker(expected_exception=ServiceUnavailableError),
             "news": CircuitBreaker(expected_exception=ServiceUnavailableError),
         }
+        self.single_flight = SingleFlight()
+        self.weather_cache = TTLCache(config.behavior.weather_cache_ttl)
+        self._refresh_tasks = {}
+        self.headlines: Optional[CacheEntry] = None
+        self._partial_intent: Optional[IncrementalIntent] = None
+        self._speculation: Optional[Speculation] = None
+        self._speculation_timer: Optional[asyncio.TimerHandle] = None
+        self._current_command: Optional[asyncio.Task] = None
+        self._queued_commands = deque()
 
         self.intent_handlers = {
             "time_query": self._handle_time_request, "date_query": self._handle_date_request,
@@ -32,25 +83,183 @@ class AdvancedJARVIS:
             "sleep_command": self._go_to_sleep, "conversation": self._handle_conversation,
             "health_check": self._handle_health_check,
         }
+        # Intents whose response can be prepared without side effects, so it is safe to
+        # start on a partial transcript and throw away if the final one disagrees. A responder
+        # returns None when it cannot answer without side effects; the handler then runs as usual.
+        self.speculative_responders = {
+            "time_query": self._time_response, "date_query": self._date_response,
+            "weather_query": self._cached_weather_response, "joke_request": self._joke_response,
+        }
 
     async def run(self):
         await self.speech_recognizer.initialize()
         await self._speak(*await self.conversation_service.generate_response("wake_up"))
         
         background_tasks = [asyncio.create_task(self._health_check_loop())]
+        if self.config.api_keys.get("news"):
+            background_tasks.append(asyncio.create_task(self._news_prefetch_loop()))
+        if self.config.voice_settings.prewarm_cache:
+            background_tasks.append(asyncio.create_task(
+                self.tts_engine.prewarm(self.conversation_service.static_phrases())
+            ))
 
         try:
+            # Commands are processed in a task so we keep listening while JARVIS speaks.
             while self.is_running:
-                command = await self.speech_recognizer.listen()
+                command = await self.speech_recognizer.listen(on_partial=self._on_partial_transcript)
                 if command:
-                    await self._process_command(command)
+                    await self._accept_command(command, self.speech_recognizer.last_timings, self._take_speculation(),
+                                               self.speech_recognizer.last_heard)
                 await self._check_auto_sleep()
         finally:
+            self._queued_commands.clear()
+            if self._current_command is not None:
+                background_tasks.append(self._current_command)
             for task in background_tasks:
                 task.cancel()
             await asyncio.gather(*background_tasks, return_exceptions=True)
 
-    async def _process_command(self, command: str):
+    async def _accept_command(self, command: str, timings: dict, speculation: Optional[Speculation],
+                              heard: Optional[Tuple[float, float]] = None):
+        """Starts a command now, or queues it behind the one in progress.
+
+        heard is the wall-clock interval the command was spoken in, when the recognizer knows it.
+        """
+        if self._may_be_echo(command, heard):
+            if speculation is not None:
+                self._cancel_speculation(speculation)
+            # Recognition can finish after playback has, so is_speaking alone misses these.
+            self.metrics.counters["commands.ignored"] += 1
+            logging.info("Ignored a command heard over JARVIS's own speech; say the wake word to interrupt.")
+            return
+        current = self._current_command
+        if self._should_barge_in(command, current):
+            self._queued_commands.clear()
+            self.tts_engine.stop()
+            current.cancel()
+            await asyncio.gather(current, return_exceptions=True)
+        elif current is not None and not current.done():
+            if speculation is not None:
+                self._cancel_speculation(speculation)
+            if self.tts_engine.is_speaking:
+                # Without the wake word this may be JARVIS hearing itself, so it is not acted on.
+                self.metrics.counters["commands.ignored"] += 1
+                logging.info("Ignored a command heard while speaking; say the wake word to interrupt.")
+            elif len(self._queued_commands) >= self.config.behavior.command_queue_size:
+                self.metrics.counters["commands.ignored"] += 1
+                logging.warning("Command queue is full; ignoring the latest command.")
+            else:
+                logging.info("A command is still in progress; the new one will run after it.")
+                self._queued_commands.append((command, timings))
+            return
+        self._start_command(command, timings, speculation)
+
+    def _start_command(self, command: str, timings: dict, speculation: Optional[Speculation] = None):
+        task = asyncio.create_task(self._process_command(command, timings, speculation))
+        task.add_done_callback(self._start_queued_command)
+        self._current_command = task
+
+    def _start_queued_command(self, task: asyncio.Task):
+        # A barge-in has already replaced this task and cleared the queue.
+        if task is self._current_command and self._queued_commands and self.is_running:
+            self._start_command(*self._queued_commands.popleft())
+
+    def _may_be_echo(self, command: str, heard: Optional[Tuple[float, float]]) -> bool:
+        settings = self.config.speech_settings
+        if heard is None or not settings.barge_in_requires_wake_word:
+            return False
+        if any(word in command for word in self.config.wake_words):
+            return False
+        return self.tts_engine.played_during(*heard, tail=settings.echo_tail_seconds)
+
+    def _should_barge_in(self, command: str, current_command: Optional[asyncio.Task]) -> bool:
+        if current_command is None or current_command.done():
+            return False
+        # The microphone also hears JARVIS itself, so only an addressed command may interrupt.
+        if self.config.speech_settings.barge_in_requires_wake_word:
+            return any(word in command for word in self.config.wake_words)
+        return True
+
+    def _on_partial_transcript(self, text: Optional[str]):
+        """Follows a transcript in progress; once its intent settles, starts preparing the response."""
+        if text is None:
+            # The utterance was dropped, so whatever was started for it is moot.
+            speculation = self._take_speculation()
+            if speculation is not None:
+                self._cancel_speculation(speculation)
+            return
+        behavior = self.config.behavior
+        if not (self.is_active and behavior.speculative_intents):
+            return
+        if self._partial_intent is None:
+            self._partial_intent = self.intent_parser.incremental(behavior.speculation_settle_time)
+        # Final transcripts are lowercased before parsing, so partials must be too.
+        if self._partial_intent.feed(text.lower()):
+            if self._speculation_timer is not None:
+                self._speculation_timer.cancel()
+            self._speculation_timer = asyncio.get_running_loop().call_later(
+                behavior.speculation_settle_time, self._maybe_speculate
+            )
+
+    def _maybe_speculate(self):
+        self._speculation_timer = None
+        reading = self._partial_intent.settled() if self._partial_intent is not None else None
+        if reading is None:
+            return
+        intent, entities = reading
+        if self._speculation is not None:
+            if self._speculation.matches(intent, entities):
+                return
+            self._cancel_speculation(self._speculation)
+            self._speculation = None
+        responder = self.speculative_responders.get(intent)
+        if responder is not None:
+            logging.debug(f"Speculatively preparing {intent} {entities}")
+            with no_trace():
+                task = asyncio.create_task(self._prepare_response(responder, entities))
+            self._speculation = Speculation(intent, entities, task)
+
+    async def _prepare_response(self, responder, entities) -> Optional[tuple]:
+        response = await responder(entities)
+        if response is not None:
+            await self.tts_engine.presynthesize(*response)
+        return response
+
+    def _take_speculation(self) -> Optional[Speculation]:
+        """Ends partial tracking for the utterance that just finished and hands over its speculation."""
+        if self._speculation_timer is not None:
+            self._speculation_timer.cancel()
+            self._speculation_timer = None
+        self._partial_intent = None
+        speculation, self._speculation = self._speculation, None
+        return speculation
+
+    def _cancel_speculation(self, speculation: Speculation):
+        speculation.cancel()
+        self.metrics.counters["speculation.cancelled"] += 1
+
+    async def _process_command(self, command: str, capture_timings: Optional[dict] = None,
+                               speculation: Optional[Speculation] = None):
+        if self.config.tracing.include_command_text:
+            trace_attrs = {"command": command}
+        else:
+            trace_attrs = {"command_chars": len(command)}
+        with self.tracer.trace("command", **trace_attrs) as trace:
+            if trace is not None and capture_timings:
+                # Capture happens before the command exists, so its stages are back-filled.
+                cursor = time.perf_counter()
+                for stage in ("recognize", "listen"):
+                    if stage in capture_timings:
+                        cursor -= capture_timings[stage]
+                        trace.add_span(f"speech.{stage}", cursor, capture_timings[stage])
+            try:
+                await self._dispatch_command(command, trace, speculation)
+            finally:
+                # Covers a command that was interrupted or failed before using its speculation.
+                if speculation is not None and not speculation.task.done():
+                    speculation.cancel()
+
+    async def _dispatch_command(self, command: str, trace: Optional[Trace], speculation: Optional[Speculation] = None):
         self.last_activity_time = time.time()
         if not self.is_active:
             if any(word in command for word in self.config.wake_words):
@@ -58,24 +267,67 @@ class AdvancedJARVIS:
             return
 
         start_time = time.time()
-        intent, entities = await self.intent_parser.parse(command)
+        deadline_start = time.monotonic()
+        with span("intent.parse"):
+            intent, entities = await self.intent_parser.parse(command)
+        if speculation is not None and not speculation.matches(intent, entities):
+            self._cancel_speculation(speculation)
+            speculation = None
+        if trace is not None:
+            trace.attrs["intent"] = intent
+            trace.attrs["speculative"] = speculation is not None
         handler = self.intent_handlers.get(intent)
         
         if handler:
-            await handler(entities)
+            budget = self.config.behavior.intent_deadlines.get(intent, self.config.behavior.command_deadline)
+            try:
+                with deadline_scope(budget, start=deadline_start), span(f"handler.{intent}"):
+                    if speculation is not None:
+                        await self._confirm_speculation(speculation, handler, entities)
+                    else:
+                        await handler(entities)
+            except DeadlineExceededError as e:
+                logging.warning(f"Command deadline exceeded for {intent}: {e}")
+                await self._speak(*await self.conversation_service.generate_response("timeout"))
+                self.metrics.record_command_processing(intent, time.time() - start_time, False)
+                return
             self.metrics.record_command_processing(intent, time.time() - start_time, True)
         else:
             logging.warning(f"No handler for intent: {intent}")
             await self._speak(*await self.conversation_service.generate_response("error"))
             self.metrics.record_command_processing(intent, time.time() - start_time, False)
 
+    async def _confirm_speculation(self, speculation: Speculation, handler, entities):
+        """Speaks the response prepared from the partial transcript, which the final one confirmed."""
+        with span("speculation.confirm", ready=speculation.task.done()):
+            response = await within_deadline(speculation.task, "speculation")
+        if response is None:
+            await handler(entities)
+            return
+        self.metrics.counters["speculation.confirmed"] += 1
+        await self._speak(*response)
+
     async def _speak(self, text: str, emotion: str):
         try:
-            await self.tts_engine.speak(text, emotion)
+            with span("tts.speak", chars=len(text)):
+                await self.tts_engine.speak(text, emotion)
+        except DeadlineExceededError:
+            raise  # _dispatch_command answers with the timeout response instead.
         except Exception as e:
             logging.error(f"TTS engine failed: {e}")
             print(f"JARVIS (audio failed): {text}")
 
+    async def _speak_sequence(self, items: list):
+        try:
+            with span("tts.speak_sequence", items=len(items)):
+                await self.tts_engine.speak_sequence(items)
+        except DeadlineExceededError:
+            raise  # _dispatch_command answers with the timeout response instead.
+        except Exception as e:
+            logging.error(f"TTS engine failed: {e}")
+            for text, _ in items:
+                print(f"JARVIS (audio failed): {text}")
+
     async def _wake_up(self):
         self.is_active = True
         self.last_activity_time = time.time()
@@ -94,29 +346,124 @@ class AdvancedJARVIS:
             await self.health_monitor.check_system_health()
             await asyncio.sleep(self.config.behavior.health_check_interval)
             
+    async def _news_prefetch_loop(self):
+        behavior = self.config.behavior
+        while self.is_running:
+            # The fetch itself spends from the news budget; the reserve is left for live requests.
+            budget = self.api_rate_limiter.available(self.news_service.rate_limit_key)
+            if budget > behavior.news_prefetch_reserve:
+                try:
+                    await self._fetch_headlines()
+                except (ServiceUnavailableError, CircuitBreakerOpenError) as e:
+                    logging.warning(f"Headline prefetch failed: {e}")
+                except Exception as e:
+                    # A bug in one fetch must not end prefetching for the rest of the session.
+                    logging.error(f"Headline prefetch failed unexpectedly: {e!r}", exc_info=True)
+            else:
+                logging.info("News request budget is down to its reserve; skipping headline prefetch.")
+            jitter = random.uniform(-behavior.news_refresh_jitter, behavior.news_refresh_jitter)
+            await asyncio.sleep(behavior.news_refresh_interval * (1 + jitter))
+
+    async def _fetch_headlines(self) -> list:
+        articles = await within_deadline(self.single_flight.do(
+            ("news", "top_headlines"), self.circuit_breakers["news"].call, self.news_service.get_top_headlines
+        ), "news")
+        self.headlines = CacheEntry(articles, time.monotonic())
+        return articles
+
+    async def _get_headlines(self) -> list:
+        """Serves the prefetched snapshot, fetching live only when it is too old."""
+        snapshot = self.headlines
+        if snapshot is not None and snapshot.age <= self.config.behavior.news_max_age:
+            return snapshot.value
+        try:
+            return await self._fetch_headlines()
+        except (ServiceUnavailableError, CircuitBreakerOpenError, DeadlineExceededError) as e:
+            if snapshot is None:
+                raise
+            logging.warning(f"Serving last known headlines: {e}")
+            return snapshot.value
+
     async def _handle_time_request(self, entities):
+        await self._speak(*await self._time_response(entities))
+
+    async def _time_response(self, entities) -> tuple:
         now = datetime.now()
-        await self._speak(*await self.conversation_service.generate_response("time", {"time": now.strftime("%I:%M %p")}))
+        return await self.conversation_service.generate_response("time", {"time": now.strftime("%I:%M %p")})
 
     async def _handle_date_request(self, entities):
+        await self._speak(*await self._date_response(entities))
+
+    async def _date_response(self, entities) -> tuple:
         now = datetime.now()
-        await self._speak(*await self.conversation_service.generate_response("date", {"date": now.strftime("%A, %B %d, %Y")}))
+        return await self.conversation_service.generate_response("date", {"date": now.strftime("%A, %B %d, %Y")})
+
+    async def _fetch_weather(self, key: str, location: str) -> dict:
+        weather_data = await within_deadline(self.single_flight.do(
+            ("weather", key), self.circuit_breakers["weather"].call, self.weather_service.get_weather, location
+        ), "weather")
+        self.weather_cache.set(key, weather_data)
+        return weather_data
+
+    async def _refresh_weather(self, key: str, location: str):
+        try:
+            with no_deadline():
+                await self._fetch_weather(key, location)
+        except Exception as e:
+            # Nobody awaits this task, so any failure must end here rather than in the loop's handler.
+            logging.warning(f"Background weather refresh for {location!r} failed: {e!r}")
+        finally:
+            self._refresh_tasks.pop(key, None)
+
+    @staticmethod
+    def _weather_key(location: str) -> str:
+        return " ".join(location.lower().split())
+
+    async def _get_weather(self, location: str) -> dict:
+        """Serves weather from cache, revalidating stale entries in the background."""
+        key = self._weather_key(location)
+        entry = self.weather_cache.get(key)
+        if entry is not None and self.weather_cache.is_fresh(entry):
+            return entry.value
+        if entry is not None and entry.age < self.config.behavior.weather_max_stale:
+            if key not in self._refresh_tasks:
+                with no_trace():
+                    self._refresh_tasks[key] = asyncio.create_task(self._refresh_weather(key, location))
+            return entry.value
+        try:
+            return await self._fetch_weather(key, location)
+        except (ServiceUnavailableError, CircuitBreakerOpenError, DeadlineExceededError) as e:
+            if entry is None:
+                raise
+            logging.warning(f"Serving last known weather for {location!r}: {e}")
+            return entry.value
 
     async def _handle_weather_request(self, entities):
+        await self._speak(*await self._weather_response(entities))
+
+    async def _weather_response(self, entities) -> tuple:
         location = entities.get('location', self.config.default_location)
         try:
-            weather_data = await self.circuit_breakers["weather"].call(self.weather_service.get_weather, location)
-            await self._speak(*await self.conversation_service.generate_response("weather", weather_data))
+            weather_data = await self._get_weather(location)
+            return await self.conversation_service.generate_response("weather", weather_data)
         except (ServiceUnavailableError, CircuitBreakerOpenError) as e:
             logging.error(e)
-            await self._speak("The weather service is currently unavailable, sir. Please try again later.", "concerned")
+            return "The weather service is currently unavailable, sir. Please try again later.", "concerned"
+
+    async def _cached_weather_response(self, entities) -> Optional[tuple]:
+        """Speculative weather: answers only from a fresh cache entry, never from the API."""
+        # A call here would spend rate-limit budget and breaker state on a command that may never come.
+        location = entities.get('location', self.config.default_location)
+        entry = self.weather_cache.get(self._weather_key(location))
+        if entry is None or not self.weather_cache.is_fresh(entry):
+            return None
+        return await self.conversation_service.generate_response("weather", entry.value)
 
     async def _handle_news_request(self, entities):
         await self._speak(*await self.conversation_service.generate_response("news"))
         try:
-            articles = await self.circuit_breakers["news"].call(self.news_service.get_top_headlines)
-            for article in articles:
-                await self._speak(article['title'], "serious")
+            articles = await self._get_headlines()
+            await self._speak_sequence([(article['title'], "serious") for article in articles if article.get('title')])
         except (ServiceUnavailableError, CircuitBreakerOpenError) as e:
             logging.error(e)
             await self._speak("I'm unable to fetch the news at this moment, sir.", "concerned")
@@ -134,14 +481,18 @@ class AdvancedJARVIS:
         await self.media_service.play_on_youtube(query)
 
     async def _handle_joke_request(self, entities):
+        await self._speak(*await self._joke_response(entities))
+
+    async def _joke_response(self, entities) -> tuple:
         joke = pyjokes.get_joke()
-        await self._speak(*await self.conversation_service.generate_response("joke", {"joke": joke}))
+        return await self.conversation_service.generate_response("joke", {"joke": joke})
 
     async def _handle_conversation(self, entities):
         await self._speak(*await self.conversation_service.generate_response("conversation"))
 
     async def _handle_health_check(self, entities):
-        health = await self.system_service.get_system_info()
+        with span("system.info"):
+            health = await self.system_service.get_system_info()
         response = f"All systems are functioning within normal parameters, sir. CPU is at {health['cpu']}% and memory is at {health['memory']}%."
         await self._speak(response, "professional")
 
@@ -150,6 +501,10 @@ class AdvancedJARVIS:
 
     async def shutdown(self):
         self.is_running = False
+        refreshes = list(self._refresh_tasks.values())
+        for task in refreshes:
+            task.cancel()
+        await asyncio.gather(*refreshes, return_exceptions=True)
         if self.is_active:
             await self._speak("JARVIS shutting down. Goodbye, sir.", "calm")
         await self.tts_engine.close()
@@ -0,0 +1,171 @@
+# ==============================================================================
+# File: core/migrations.py
+# Description: Versioned, in-place schema migrations for the JARVIS database,
+#              including the upgrade from the legacy root-level database.py schema.
+# ==============================================================================
+import logging
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+# progress(step, rows_done, rows_total)
+ProgressCallback = Callable[[str, int, int], None]
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+def _copy_in_batches(conn: sqlite3.Connection, step: str, source: str, insert_sql: str,
+                     batch_size: int, progress: Optional[ProgressCallback], after_id: int = -1):
+    """Copies rows with an id above `after_id` by ascending id, one short transaction per batch.
+
+    Rows are moved with INSERT ... SELECT inside SQLite, so memory use does not depend on
+    table size, and other connections can read between batches.
+    """
+    total = conn.execute(f"SELECT COUNT(*) FROM {source} WHERE id > ?", (after_id,)).fetchone()[0]
+    done, last_id = 0, after_id
+    while True:
+        with conn:
+            copied = conn.execute(insert_sql, (last_id, batch_size)).rowcount
+            if copied <= 0:
+                break
+            last_id = conn.execute(
+                f"SELECT MAX(id) FROM (SELECT id FROM {source} WHERE id > ? ORDER BY id LIMIT ?)",
+                (last_id, batch_size),
+            ).fetchone()[0]
+        done += copied
+        if progress:
+            progress(step, done, total)
+
+def _migrate_core_schema(conn: sqlite3.Connection, batch_size: int, progress: Optional[ProgressCallback]):
+    """Core memories table with timestamps, plus user preferences.
+
+    A legacy database.py store has memories(id, content, timestamp); its rows are copied
+    into the core table keeping their ids and timestamps. Its user_preferences table has
+    the same shape in both schemas and is kept as is.
+    """
+    columns = _table_columns(conn, "memories")
+    is_legacy = "timestamp" in columns and "category" not in columns
+    if is_legacy:
+        conn.execute("ALTER TABLE memories RENAME TO memories_legacy")
+        conn.commit()
+        columns = []
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER PRIMARY KEY,
+            content TEXT NOT NULL,
+            category TEXT,
+            tags TEXT,
+            created_at TEXT
+        )
+    """)
+    if columns and "created_at" not in columns:
+        conn.execute("ALTER TABLE memories ADD COLUMN created_at TEXT")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+    _copy_legacy_memories(conn, batch_size, progress)
+
+def _copy_legacy_memories(conn: sqlite3.Connection, batch_size: int, progress: Optional[ProgressCallback]):
+    """Moves rows from a renamed legacy table into the core table, then drops it.
+
+    The copy resumes after the highest id already copied, so a run interrupted between
+    batches picks up where it stopped instead of leaving the rest of the rows behind.
+    """
+    if not _table_exists(conn, "memories_legacy"):
+        return
+    copied_up_to = conn.execute("SELECT COALESCE(MAX(id), -1) FROM memories").fetchone()[0]
+    if copied_up_to >= 0:
+        logging.info(f"Resuming the legacy memories copy after id {copied_up_to}.")
+    _copy_in_batches(conn, "memories", "memories_legacy", """
+        INSERT INTO memories (id, content, category, tags, created_at)
+        SELECT id, content, NULL, '[]', timestamp FROM memories_legacy
+        WHERE id > ? ORDER BY id LIMIT ?
+    """, batch_size, progress, after_id=copied_up_to)
+    conn.execute("DROP TABLE memories_legacy")
+    conn.commit()
+
+def _migrate_search_index(conn: sqlite3.Connection, batch_size: int, progress: Optional[ProgressCallback]):
+    """FTS5 index over memories, kept in sync by triggers and built in one pass."""
+    conn.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+            content, category, tags, content='memories', content_rowid='id'
+        );
+        CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+            INSERT INTO memories_fts(rowid, content, category, tags)
+            VALUES (new.id, new.content, new.category, new.tags);
+        END;
+        CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, content, category, tags)
+            VALUES ('delete', old.id, old.content, old.category, old.tags);
+        END;
+        CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, content, category, tags)
+            VALUES ('delete', old.id, old.content, old.category, old.tags);
+            INSERT INTO memories_fts(rowid, content, category, tags)
+            VALUES (new.id, new.content, new.category, new.tags);
+        END;
+    """)
+    # Rows copied or written before the triggers existed are not indexed yet.
+    total = conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+    with conn:
+        conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+    if progress:
+        progress("memories_fts", total, total)
+
+def _migrate_vector_changes(conn: sqlite3.Connection, batch_size: int, progress: Optional[ProgressCallback]):
+    """Records memories whose text changed or that were deleted, for the vector index to catch up on.
+
+    The index lives outside SQLite, so triggers leave a tombstone per changed id and the
+    writer re-embeds or drops those ids before clearing them.
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS memory_vector_changes (id INTEGER PRIMARY KEY);
+        CREATE TRIGGER IF NOT EXISTS memories_vector_ad AFTER DELETE ON memories BEGIN
+            INSERT OR IGNORE INTO memory_vector_changes (id) VALUES (old.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS memories_vector_au AFTER UPDATE OF id, content ON memories BEGIN
+            INSERT OR IGNORE INTO memory_vector_changes (id) VALUES (old.id);
+            INSERT OR IGNORE INTO memory_vector_changes (id) VALUES (new.id);
+        END;
+    """)
+
+# (version, description, step), applied in order to databases below that version.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "core memories schema with timestamps and preferences", _migrate_core_schema),
+    (2, "full-text search index", _migrate_search_index),
+    (3, "vector index change log", _migrate_vector_changes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection, batch_size: int = 1000,
+            progress: Optional[ProgressCallback] = None) -> int:
+    """Upgrades the database in place to SCHEMA_VERSION and returns the final version."""
+    version = schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise sqlite3.DatabaseError(
+            f"Database schema version {version} is newer than this JARVIS supports ({SCHEMA_VERSION})."
+        )
+    if version >= 1:
+        # An interrupted legacy copy may have been recorded as done by an earlier release.
+        _copy_legacy_memories(conn, batch_size, progress)
+    for target, description, step in MIGRATIONS:
+        if version >= target:
+            continue
+        logging.info(f"Migrating database schema to version {target}: {description}.")
+        step(conn, batch_size, progress)
+        conn.execute(f"PRAGMA user_version = {target}")
+        conn.commit()
+        version = target
+    return version
@@ -0,0 +1,149 @@
+# ==============================================================================
+# File: core/vector_index.py
+# Description: Local embeddings and an incremental, memory-mapped vector index
+#              for semantic memory recall. Requires NumPy; no network model.
+# ==============================================================================
+import json
+import logging
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Semantic recall is optional.
+    np = None
+
+class HashingEmbedder:
+    """Embeds text as signed, hashed character n-gram counts, L2-normalized.
+
+    This matches on shared word pieces, so inflections, compounds and misspellings
+    ("vehicles", "vehicle's", "vehical") land close together. It has no notion of
+    synonyms; anything with an embed(texts) -> (n, dim) float32 array method, such as a
+    small CPU sentence model, can be passed to VectorIndex instead.
+    """
+    def __init__(self, dim: int = 256, ngram_sizes: Tuple[int, ...] = (3, 4)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def _features(self, text: str) -> List[int]:
+        hashes = []
+        for word in re.findall(r"\w+", text.lower()):
+            padded = f" {word} "
+            hashes.append(zlib.crc32(padded.encode("utf-8")))
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    hashes.append(zlib.crc32(padded[i:i + n].encode("utf-8")))
+        return hashes
+
+    def embed(self, texts: Iterable[str]) -> "np.ndarray":
+        texts = list(texts)
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(features)
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        # The low bits pick the bucket and the top bit picks the sign, so collisions cancel out.
+        buckets = np.asarray(rows, dtype=np.int64) * self.dim + (hashes % self.dim)
+        signs = np.where(hashes >> 31, -1.0, 1.0)
+        matrix = np.bincount(buckets, weights=signs, minlength=len(texts) * self.dim)
+        matrix = matrix.reshape(len(texts), self.dim).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+class VectorIndex:
+    """Append-only, memory-mapped matrix of unit vectors searched by cosine similarity.
+
+    Removing an id clears its slot in place; the slot is not reused.
+    """
+    def __init__(self, directory: Path, embedder=None, initial_capacity: int = 1024):
+        if np is None:
+            raise ImportError("Semantic memory recall requires NumPy.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self._lock = threading.RLock()
+        self._meta_path = self.directory / "meta.json"
+        meta = json.loads(self._meta_path.read_text()) if self._meta_path.exists() else {}
+        if meta and meta.get("dim") != self.dim:
+            logging.warning("Vector index dimension changed; rebuilding it from scratch.")
+            meta = {}
+        self.count = meta.get("count", 0)
+        self.max_id = meta.get("max_id", 0)
+        self._open(max(meta.get("capacity", 0), initial_capacity))
+
+    def _open(self, capacity: int):
+        vectors_path, ids_path = self.directory / "vectors.f32", self.directory / "ids.i64"
+        for path, itemsize in ((vectors_path, 4 * self.dim), (ids_path, 8)):
+            with open(path, "ab") as f:
+                f.truncate(max(capacity * itemsize, path.stat().st_size if path.exists() else 0))
+        self.capacity = capacity
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._ids = np.memmap(ids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self._vectors.flush()
+        self._ids.flush()
+        self._open(capacity)
+
+    def _save_meta(self):
+        self._meta_path.write_text(json.dumps(
+            {"dim": self.dim, "count": self.count, "capacity": self.capacity, "max_id": self.max_id}
+        ))
+
+    def add(self, ids: List[int], texts: List[str]):
+        if not ids:
+            return
+        vectors = self.embedder.embed(texts)
+        with self._lock:
+            end = self.count + len(ids)
+            if end > self.capacity:
+                self._grow(end)
+            self._vectors[self.count:end] = vectors
+            self._ids[self.count:end] = ids
+            self.count = end
+            self.max_id = max(self.max_id, max(ids))
+            self._vectors.flush()
+            self._ids.flush()
+            self._save_meta()
+
+    def remove(self, ids: Iterable[int]):
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            positions = np.flatnonzero(np.isin(self._ids[:self.count], ids))
+            if not len(positions):
+                return
+            self._ids[positions] = -1
+            self._vectors[positions] = 0.0
+            self._vectors.flush()
+            self._ids.flush()
+
+    def update(self, ids: List[int], texts: List[str]):
+        """Replaces the vectors of these ids, adding any the index does not have yet."""
+        with self._lock:
+            self.remove(ids)
+            self.add(ids, texts)
+
+    def search(self, query: str, k: int = 10, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Returns up to k (id, cosine similarity) pairs, best first."""
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            n = self.count
+            if n == 0:
+                return []
+            scores = self._vectors[:n] @ query_vector
+            ids = np.array(self._ids[:n])
+        scores[ids < 0] = -np.inf
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] >= min_score]
@@ -4,25 +4,51 @@
 # Description: Main entry point for the Advanced JARVIS AI Assistant.
 #              Initializes all components and starts the application.
 # ==============================================================================
+import asyncio
+import logging
+import signal
+import sys
+from typing import Optional
+
+from core.config import JarvisConfig
+from core.database import DatabaseManager
+from core.exceptions import JarvisError
+from core.jarvis import AdvancedJARVIS
+from services.intent_parser import IntentParser
+from services.speech_recognizer import SpeechRecognizer
+from services.tts_engine import TTSEngine
+from utils.health_monitor import HealthMonitor
+from utils.http_client import HttpClient
+from utils.logger import setup_logging
+from utils.system_sampler import SystemSampler
 
 class JarvisApplication:
     """Main application orchestrator."""
     def __init__(self):
         self.jarvis: Optional[AdvancedJARVIS] = None
         self.db_manager: Optional[DatabaseManager] = None
+        self.http_client: Optional[HttpClient] = None
+        self.system_sampler: Optional[SystemSampler] = None
 
     async def initialize(self):
         setup_logging()
         config = JarvisConfig()
         
-        self.db_manager = DatabaseManager(config.database_path)
+        self.db_manager = DatabaseManager(config.database_path, config.database_settings)
+        self.http_client = HttpClient(config.http_settings)
+        await self.http_client.start()
         tts_engine = TTSEngine(config.voice_settings)
         speech_recognizer = SpeechRecognizer(config.speech_settings)
         intent_parser = IntentParser()
-        health_monitor = HealthMonitor()
+        self.system_sampler = SystemSampler(
+            config.behavior.system_sample_interval, config.behavior.system_sample_window
+        )
+        self.system_sampler.start()
+        health_monitor = HealthMonitor(self.system_sampler)
         
         self.jarvis = AdvancedJARVIS(
-            config, self.db_manager, tts_engine, speech_recognizer, intent_parser, health_monitor
+            config, self.db_manager, tts_engine, speech_recognizer, intent_parser, health_monitor,
+            self.http_client
         )
 
     async def run(self):
@@ -39,12 +65,31 @@ class JarvisApplication:
         logging.info("Initiating graceful shutdown...")
         if self.jarvis:
             await self.jarvis.shutdown()
+        if self.http_client:
+            await self.http_client.close()
+        if self.system_sampler:
+            self.system_sampler.stop()
         if self.db_manager:
+            await self.db_manager.flush()
             await self.db_manager.close()
         logging.info("Shutdown complete.")
 
+async def rebuild_memory_index():
+    """Rebuilds the memory full-text index of an existing database."""
+    setup_logging()
+    config = JarvisConfig()
+    db_manager = DatabaseManager(config.database_path, config.database_settings)
+    try:
+        await db_manager.rebuild_search_index()
+    finally:
+        await db_manager.close()
+
 async def main_entry():
     """Main entry point with setup instructions."""
+    if "--rebuild-memory-index" in sys.argv[1:]:
+        await rebuild_memory_index()
+        return
+
     print("--- JARVIS AI Assistant Setup ---")
     print("1. Create a file named '.env' in the same directory.")
     print("2. Add your API keys to the .env file, for example:")
@@ -0,0 +1,360 @@
+# ==============================================================================
+# File: services/audio_capture.py
+# Description: Continuous audio capture into a preallocated PCM ring buffer,
+#              with energy-based endpointing that cuts utterances out of the
+#              buffer as zero-copy views.
+# ==============================================================================
+import logging
+import queue
+import threading
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import speech_recognition as sr
+
+# PCM sample width -> signed little-endian dtype, as audioop read it (8-bit included).
+# 24-bit samples have no dtype of their own and are unpacked by pcm_samples().
+_SAMPLE_DTYPES = {1: "i1", 2: "<i2", 4: "<i4"}
+PCM_SAMPLE_WIDTHS = frozenset((*_SAMPLE_DTYPES, 3))
+# WAV stores 8-bit audio unsigned; flipping the top bit makes it signed, as AudioData expects.
+_UNSIGNED_TO_SIGNED_8 = bytes(value ^ 0x80 for value in range(256))
+
+def pcm_samples(views: Sequence, width: int) -> np.ndarray:
+    """Signed samples of little-endian PCM split across buffers, read in place where possible."""
+    if width == 3:
+        # A wrapped segment may split a sample, so 24-bit audio is joined before unpacking.
+        raw = np.frombuffer(b"".join(views), dtype="u1")
+        raw = raw[:len(raw) - len(raw) % 3].reshape(-1, 3)
+        padded = np.zeros((len(raw), 4), dtype="u1")
+        padded[:, 1:] = raw
+        # Left-aligned in 32 bits, an arithmetic shift back down carries the sign.
+        return padded.view("<i4").ravel() >> 8
+    arrays = [np.frombuffer(view, dtype=_SAMPLE_DTYPES[width]) for view in views]
+    return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+def _chunk_rms(chunk: bytes, width: int) -> float:
+    """Root-mean-square level of a PCM chunk, on the same scale audioop.rms used."""
+    samples = pcm_samples((chunk,), width)
+    if not len(samples):
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+
+class BufferOverrunError(Exception):
+    """Raised when audio has already been overwritten in the ring buffer."""
+
+class AudioRingBuffer:
+    """Preallocated PCM ring buffer addressed by absolute byte offsets.
+
+    Offsets count every byte ever written, so an utterance is just a (start, end)
+    pair and stays valid until the writer laps it.
+    """
+    def __init__(self, capacity: int, frame_width: int):
+        capacity -= capacity % frame_width
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self.write_pos = 0
+
+    @property
+    def oldest_pos(self) -> int:
+        return max(0, self.write_pos - self.capacity)
+
+    def write(self, data: bytes):
+        data = memoryview(data).cast("B")
+        size = len(data)
+        if size > self.capacity:
+            data = data[size - self.capacity:]
+        offset = (self.write_pos + size - len(data)) % self.capacity
+        first = min(len(data), self.capacity - offset)
+        self._view[offset:offset + first] = data[:first]
+        if first < len(data):
+            self._view[:len(data) - first] = data[first:]
+        # Published last, so readers never see a position whose bytes are not there yet.
+        self.write_pos += size
+
+    def views(self, start: int, end: int) -> Tuple[memoryview, ...]:
+        """The bytes in [start, end) as one view, or two when the range wraps."""
+        if start < self.oldest_pos:
+            raise BufferOverrunError(f"Audio at offset {start} has been overwritten.")
+        if end <= start:
+            return (self._view[0:0],)
+        begin, stop = start % self.capacity, (end - 1) % self.capacity + 1
+        if begin < stop:
+            return (self._view[begin:stop],)
+        return self._view[begin:], self._view[:stop]
+
+@dataclass
+class Utterance:
+    """One endpointed phrase, referenced in place inside the ring buffer.
+
+    A phrase handed out while it is still being spoken grows: `end` advances with the
+    capture until wait() returns True. A phrase that turns out too short to be speech
+    finishes with `discarded` set. `captured_at` is the wall-clock time of `start`.
+    """
+    buffer: AudioRingBuffer
+    start: int
+    end: int
+    sample_rate: int
+    sample_width: int
+    captured_at: float
+    discarded: bool = False
+    _finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def finish(self, end: int, discarded: bool = False):
+        self.end = end
+        self.discarded = discarded
+        self._finished.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the phrase has ended; False on timeout."""
+        return self._finished.wait(timeout)
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / (self.sample_rate * self.sample_width)
+
+    @property
+    def ended_at(self) -> float:
+        return self.captured_at + self.duration
+
+    def is_intact(self) -> bool:
+        return self.start >= self.buffer.oldest_pos
+
+    def views(self) -> Tuple[memoryview, ...]:
+        return self.buffer.views(self.start, self.end)
+
+    def to_audio_data(self) -> sr.AudioData:
+        # The only copy: recognizer backends need one contiguous bytes object.
+        data = b"".join(self.views())
+        if not self.is_intact():
+            raise BufferOverrunError("Utterance was overwritten while it was being read.")
+        return sr.AudioData(data, self.sample_rate, self.sample_width)
+
+class MicrophoneSource:
+    """Keeps one microphone input stream open for the life of the capture."""
+    live = True
+
+    def __init__(self, microphone: sr.Microphone):
+        self.microphone = microphone
+        self.sample_rate = microphone.SAMPLE_RATE
+        self.sample_width = microphone.SAMPLE_WIDTH
+        self._stream = None
+
+    def open(self):
+        self._stream = self.microphone.__enter__().stream
+
+    def read(self, frames: int) -> bytes:
+        return self._stream.read(frames)
+
+    def close(self):
+        if self._stream is not None:
+            self.microphone.__exit__(None, None, None)
+            self._stream = None
+
+class WavFileSource:
+    """Reads mono PCM from a WAV file, optionally paced to real time, for microphone-free runs."""
+    live = False
+
+    def __init__(self, path: str, realtime: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self._wav: Optional[wave.Wave_read] = None
+        with wave.open(path, "rb") as wav:
+            if wav.getnchannels() != 1:
+                raise ValueError(f"{path} has {wav.getnchannels()} channels; only mono audio is supported.")
+            self.sample_rate = wav.getframerate()
+            self.sample_width = wav.getsampwidth()
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        self._next_read = time.monotonic()
+
+    def read(self, frames: int) -> bytes:
+        data = self._wav.readframes(frames)
+        if self.sample_width == 1:
+            data = data.translate(_UNSIGNED_TO_SIGNED_8)
+        if self.realtime and data:
+            self._next_read += len(data) / (self.sample_rate * self.sample_width)
+            time.sleep(max(0.0, self._next_read - time.monotonic()))
+        return data
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+class NoiseFloorEstimator:
+    """Keeps the recognizer's energy threshold in line with the room's current noise.
+
+    The quietest chunks in a rolling window approximate the noise floor even while people
+    talk, since speech always has gaps. An exponential moving average of that level rides
+    out single bursts, and the threshold sits `dynamic_energy_ratio` above it, as it does
+    after Recognizer.adjust_for_ambient_noise.
+    """
+    def __init__(self, recognizer: sr.Recognizer, chunks_per_second: float, window_seconds: float = 5.0,
+                 alpha: float = 0.3, quantile: float = 0.2, update_interval: float = 1.0,
+                 min_threshold: float = 50.0, initial_floor: Optional[float] = None):
+        self.recognizer = recognizer
+        self.alpha = alpha
+        self.quantile = quantile
+        self.min_threshold = min_threshold
+        self.noise_floor = initial_floor
+        self._levels = deque(maxlen=max(1, int(window_seconds * chunks_per_second)))
+        self._update_every = max(1, int(update_interval * chunks_per_second))
+        self._since_update = 0
+
+    def observe(self, rms: float):
+        self._levels.append(rms)
+        self._since_update += 1
+        if self._since_update < self._update_every:
+            return
+        self._since_update = 0
+        levels = sorted(self._levels)
+        level = levels[int(self.quantile * (len(levels) - 1))]
+        if self.noise_floor is None:
+            self.noise_floor = level
+        else:
+            self.noise_floor += self.alpha * (level - self.noise_floor)
+        self.recognizer.energy_threshold = max(
+            self.min_threshold, self.noise_floor * self.recognizer.dynamic_energy_ratio
+        )
+
+class ContinuousCapture:
+    """Reads a source on a daemon thread into a ring buffer and queues endpointed utterances.
+
+    Endpointing mirrors speech_recognition's Recognizer.listen: a phrase starts when a chunk's
+    RMS energy crosses the threshold, keeps `pre_roll` seconds of audio before that point so
+    leading syllables are not clipped, and ends after `pause_threshold` seconds of quiet or
+    at `phrase_time_limit`. With a noise estimator, every chunk's energy also feeds it.
+
+    With `stream_phrases`, a phrase is queued as soon as it starts so a streaming recognizer
+    can follow it while it is spoken; otherwise only finished phrases long enough to be
+    speech are queued.
+    """
+    def __init__(self, source, recognizer: sr.Recognizer, buffer_seconds: float = 30.0,
+                 chunk_frames: int = 1024, pre_roll: float = 0.5, phrase_time_limit: Optional[float] = None,
+                 queue_size: int = 4, noise_estimator: Optional[NoiseFloorEstimator] = None,
+                 stream_phrases: bool = False):
+        self.source = source
+        self.recognizer = recognizer
+        self.noise_estimator = noise_estimator
+        self.stream_phrases = stream_phrases
+        self._phrase: Optional[Utterance] = None
+        self.chunk_frames = chunk_frames
+        self.phrase_time_limit = phrase_time_limit
+        self.bytes_per_second = source.sample_rate * source.sample_width
+        self.pre_roll_bytes = self._to_bytes(pre_roll)
+        self.buffer = AudioRingBuffer(self._to_bytes(buffer_seconds), source.sample_width)
+        self.utterances: "queue.Queue[Optional[Utterance]]" = queue.Queue(maxsize=queue_size)
+        self.dropped_utterances = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _to_bytes(self, seconds: float) -> int:
+        size = int(seconds * self.bytes_per_second)
+        return size - size % self.source.sample_width
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.source.open()
+        self._thread = threading.Thread(target=self._run, name="jarvis-audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.source.close()
+
+    def next_utterance(self, timeout: Optional[float] = None) -> Optional[Utterance]:
+        """The oldest queued utterance, or None on timeout or once the source is exhausted."""
+        try:
+            return self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        try:
+            self._capture()
+        except Exception as e:
+            logging.error(f"Audio capture stopped: {e}")
+        finally:
+            if self._phrase is not None and not self._phrase.wait(0):
+                self._phrase.finish(self._phrase.end, discarded=True)
+            # Wake any waiting listener; a finite source has nothing more to give.
+            self._put(None)
+
+    def _capture(self):
+        width = self.source.sample_width
+        speech_bytes = pause_bytes = 0
+        while not self._stop.is_set():
+            chunk = self.source.read(self.chunk_frames)
+            if not chunk:
+                break
+            chunk_start = self.buffer.write_pos
+            self.buffer.write(chunk)
+            end = self.buffer.write_pos
+            rms = _chunk_rms(chunk, width)
+            if self.noise_estimator is not None:
+                self.noise_estimator.observe(rms)
+            loud = rms > self.recognizer.energy_threshold
+            phrase = self._phrase
+            if phrase is None:
+                if loud:
+                    start = max(chunk_start - self.pre_roll_bytes, self.buffer.oldest_pos)
+                    self._phrase = Utterance(
+                        self.buffer, start, end, self.source.sample_rate, width,
+                        time.time() - (end - start) / self.bytes_per_second,
+                    )
+                    speech_bytes, pause_bytes = len(chunk), 0
+                    if self.stream_phrases:
+                        self._put(self._phrase)
+                continue
+            phrase.end = end
+            if loud:
+                speech_bytes += len(chunk)
+                pause_bytes = 0
+            else:
+                pause_bytes += len(chunk)
+            too_long = self.phrase_time_limit and end - phrase.start >= self.phrase_time_limit * self.bytes_per_second
+            if pause_bytes >= self.recognizer.pause_threshold * self.bytes_per_second or too_long:
+                # Keep a little trailing quiet, as Recognizer.listen does.
+                trailing = min(pause_bytes, self._to_bytes(self.recognizer.non_speaking_duration))
+                self._end_phrase(end - pause_bytes + trailing, speech_bytes)
+        if self._phrase is not None:
+            self._end_phrase(self.buffer.write_pos, speech_bytes)
+
+    def _end_phrase(self, end: int, speech_bytes: int):
+        phrase, self._phrase = self._phrase, None
+        is_phrase = speech_bytes >= self.recognizer.phrase_threshold * self.bytes_per_second
+        phrase.finish(end, discarded=not is_phrase)
+        if is_phrase and not self.stream_phrases:
+            self._put(phrase)
+
+    def _put(self, utterance: Optional[Utterance]):
+        if not self.source.live:
+            # A file can wait for the listener; blocking keeps its audio from being overrun.
+            while not self._stop.is_set():
+                try:
+                    self.utterances.put(utterance, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        # A microphone cannot wait: drop the oldest utterance rather than stall capture.
+        while True:
+            try:
+                self.utterances.put_nowait(utterance)
+                return
+            except queue.Full:
+                try:
+                    self.utterances.get_nowait()
+                    self.dropped_utterances += 1
+                except queue.Empty:
+                    pass
@@ -1,6 +1,10 @@
 # ==============================================================================
 # File: services/conversation_service.py
 # ==============================================================================
+import random
+
+from core.config import JarvisConfig
+
 class ConversationService:
     """Generates human-like, dynamic conversational responses."""
     def __init__(self, config: JarvisConfig):
@@ -14,6 +18,7 @@ class ConversationService:
             "news": ["Pulling up the latest headlines for you, sir.", "Here are the top stories at this hour."],
             "joke": ["Of course. Here is one I find amusing: {joke}", "Certainly. {joke}"],
             "confirmation": ["Acknowledged.", "Understood, sir.", "Of course.", "Consider it done."],
+            "timeout": ["My apologies, sir, that is taking longer than it should. Please try again shortly.", "That request has timed out, sir."],
             "error": ["My apologies, sir, but I seem to have encountered an internal error.", "I've run into a complication. I'll log the details for diagnostics."],
             "conversation": ["That's an interesting thought, sir.", "I will take that into consideration.", "Is there anything I can assist you with regarding that?"]
         }
@@ -25,9 +30,13 @@ class ConversationService:
         emotion_map = {
             "wake_up": "professional", "sleep": "calm", "time": "professional",
             "date": "professional", "weather": "professional", "news": "serious",
-            "joke": "happy", "confirmation": "professional", "error": "concerned",
+            "joke": "happy", "confirmation": "professional", "error": "concerned", "timeout": "concerned",
             "conversation": "calm"
         }
         emotion = emotion_map.get(intent, "professional")
 
         return template.format(**data) if data else template, emotion
+
+    def static_phrases(self) -> list:
+        """Returns every template that needs no data, i.e. can be synthesized ahead of time."""
+        return [t for templates in self.templates.values() for t in templates if "{" not in t]
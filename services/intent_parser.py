@@ -4,7 +4,10 @@
 #              using a rule-based regex approach.
 # ==============================================================================
 import re
-from typing import Tuple, Dict, Any
+import time
+from typing import Tuple, Dict, Any, Iterable, List, Optional
+
+LOCATION_PATTERN = r'\b(in|for)\b\s+([a-zA-Z\s]+)'
 
 class IntentParser:
     """Parses user commands to determine intent."""
@@ -23,21 +26,93 @@ class IntentParser:
             "sleep_command": r'\b(sleep|goodbye|shut down)\b',
             "health_check": r'\b(how are you|status report)\b',
         }
+        self._compile()
+
+    def _compile(self):
+        """Builds one scanner that reports every intent and location hit in a single pass.
+
+        Each pattern becomes a zero-width lookahead alternative, in priority order, so
+        finditer() visits every position once and records the highest-priority pattern
+        that matches there. Its first hit is the same match re.search() would return.
+        """
+        alternatives, self._intent_groups, self._priority = [], {}, {}
+        group = 1
+        for priority, (intent, pattern) in enumerate(self.patterns.items()):
+            name, inner_groups = f"i{priority}", re.compile(pattern).groups
+            alternatives.append(f"(?=(?P<{name}>{pattern}))")
+            self._intent_groups[name] = (intent, group, inner_groups)
+            self._priority[name] = priority
+            group += inner_groups + 1
+        # The location regex is case-sensitive in the original rules, so scope the flag off.
+        alternatives.append(f"(?=(?P<loc>(?-i:{LOCATION_PATTERN})))")
+        self._location_group = group
+        self._scanner = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def classify(self, command: str) -> tuple:
+        """The (intent, entities) reading of a command, without awaiting; parse() wraps this."""
+        best, best_match, location = None, None, None
+        for match in self._scanner.finditer(command):
+            name = match.lastgroup
+            if name == "loc":
+                if location is None:
+                    location = match.group(self._location_group + 2).strip()
+            elif best is None or self._priority[name] < self._priority[best]:
+                best, best_match = name, match
+
+        if best is None:
+            return "conversation", {"original_command": command}
+
+        intent, group, inner_groups = self._intent_groups[best]
+        entities = {}
+        if inner_groups > 1:
+            entities['query'] = best_match.group(group + 2).strip()
+        if location is not None:
+            entities['location'] = location
+        return intent, entities
 
     async def parse(self, command: str) -> tuple:
-        for intent, pattern in self.patterns.items():
-            match = re.search(pattern, command, re.IGNORECASE)
-            if match:
-                entities = {}
-                if len(match.groups()) > 1:
-                    entities['query'] = match.group(2).strip()
-                
-                location_match = re.search(r'\b(in|for)\b\s+([a-zA-Z\s]+)', command)
-                if location_match:
-                    entities['location'] = location_match.group(2).strip()
-                
-                return intent, entities
-        return "conversation", {"original_command": command}
+        return self.classify(command)
+
+    async def parse_many(self, commands: Iterable[str]) -> List[tuple]:
+        """Parses a batch of commands, e.g. when replaying transcript logs."""
+        return [self.classify(command) for command in commands]
+
+    def incremental(self, settle_time: float = 0.3) -> "IncrementalIntent":
+        """Starts classifying a transcript that is still being recognized."""
+        return IncrementalIntent(self, settle_time)
+
+class IncrementalIntent:
+    """Classifies a transcript word by word as partial recognition results arrive.
+
+    A partial is only matched when its text changed. The reading settles once it has
+    stayed the same for `settle_time` seconds, which typically happens in the pause
+    before the end of the utterance is detected.
+    """
+    def __init__(self, parser: IntentParser, settle_time: float = 0.3):
+        self.parser = parser
+        self.settle_time = settle_time
+        self.text = ""
+        self.reading: Optional[tuple] = None
+        self.changed_at = 0.0
+
+    def feed(self, partial: str, now: Optional[float] = None) -> bool:
+        """Takes the latest partial transcript; True if it changed the (intent, entities) reading."""
+        if partial == self.text:
+            return False
+        self.text = partial
+        reading = self.parser.classify(partial)
+        if reading == self.reading:
+            return False
+        self.reading = reading
+        self.changed_at = time.monotonic() if now is None else now
+        return True
+
+    def settled(self, now: Optional[float] = None) -> Optional[tuple]:
+        """The reading, if it names a specific intent and has held for settle_time."""
+        if self.reading is None or self.reading[0] == "conversation":
+            return None
+        now = time.monotonic() if now is None else now
+        return self.reading if now - self.changed_at >= self.settle_time else None
 
 
 
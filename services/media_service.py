@@ -0,0 +1,26 @@
+# ==============================================================================
+# File: services/media_service.py
+# Description: Opens YouTube and web searches in the default browser.
+# ==============================================================================
+import asyncio
+import logging
+import webbrowser
+
+from utils.deadline import within_deadline
+
+class MediaService:
+    async def play_on_youtube(self, query: str):
+        loop = asyncio.get_running_loop()
+        await within_deadline(loop.run_in_executor(None, self._play_blocking, query), "media.play")
+
+    def _play_blocking(self, query: str):
+        logging.info(f"Opening YouTube search for '{query}' in browser.")
+        webbrowser.open(f'https://www.youtube.com/results?search_query={query}')
+
+    async def search_web(self, query: str):
+        loop = asyncio.get_running_loop()
+        await within_deadline(loop.run_in_executor(None, self._search_blocking, query), "media.search")
+
+    def _search_blocking(self, query: str):
+        logging.info(f"Opening web search for '{query}' in browser.")
+        webbrowser.open(f'https://www.google.com/search?q={query}')
@@ -0,0 +1,41 @@
+# ==============================================================================
+# File: services/news_service.py
+# Description: Top headlines from the NewsAPI service.
+# ==============================================================================
+import asyncio
+
+import aiohttp
+
+from core.exceptions import ServiceUnavailableError
+from utils.http_client import HttpClient
+from utils.rate_limiter import RateLimiter
+from utils.tracing import span
+
+class NewsService:
+    def __init__(self, api_key: str, http_client: HttpClient, rate_limiter: RateLimiter, max_wait: float):
+        self.api_key = api_key
+        self.http_client = http_client
+        self.rate_limiter = rate_limiter
+        self.rate_limit_key = f"news:{api_key}"
+        self.max_wait = max_wait
+        self.base_url = "https://newsapi.org/v2/top-headlines"
+
+    async def get_top_headlines(self, count=3):
+        if not self.api_key: raise ServiceUnavailableError("News API key not set.")
+        params = {'country': 'us', 'apiKey': self.api_key, 'pageSize': count}
+        if not await self.rate_limiter.acquire(self.rate_limit_key, self.max_wait):
+            raise ServiceUnavailableError("News API rate limit reached.")
+        try:
+            with span("news.http"):
+                async with self.http_client.get(self.base_url, params=params) as response:
+                    if response.status != 200:
+                        raise ServiceUnavailableError(f"News API returned status {response.status}")
+                    data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ServiceUnavailableError(f"News API request failed: {e!r}") from e
+        except ValueError as e:
+            raise ServiceUnavailableError(f"News API returned invalid JSON: {e!r}") from e
+        articles = data.get("articles", []) if isinstance(data, dict) else None
+        if not isinstance(articles, list):
+            raise ServiceUnavailableError(f"News API returned an unexpected payload: {type(data).__name__}")
+        return [article for article in articles if isinstance(article, dict)]
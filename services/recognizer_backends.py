@@ -0,0 +1,173 @@
+# ==============================================================================
+# File: services/recognizer_backends.py
+# Description: Interchangeable speech-to-text engines: Google's web API, the
+#              offline Vosk engine, and a scripted stub for tests and benchmarks.
+# ==============================================================================
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import speech_recognition as sr
+
+from core.config import SpeechSettings
+
+try:
+    import vosk
+except ImportError:  # The offline engine is optional.
+    vosk = None
+
+class RecognitionStream(ABC):
+    """Recognizes one utterance from 16-bit mono PCM fed while it is still being spoken."""
+    @abstractmethod
+    def accept(self, pcm: memoryview) -> str:
+        """Feeds more audio and returns the partial transcript so far."""
+
+    @abstractmethod
+    def finish(self) -> Optional[str]:
+        """Ends the utterance and returns its final transcript, if any."""
+
+class RecognizerBackend(ABC):
+    """Turns one utterance into text. recognize() is called from a worker thread.
+
+    Backends with `streaming` set can also follow an utterance as it is captured through
+    start_stream(), reporting partial transcripts along the way.
+    """
+    name = "base"
+    streaming = False
+
+    @abstractmethod
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        """Transcribes a whole utterance, or returns None if nothing was understood."""
+
+    def start_stream(self, sample_rate: int) -> RecognitionStream:
+        """Begins recognizing an utterance fed as it is captured; only for `streaming` backends."""
+        raise NotImplementedError(f"The {self.name} backend only recognizes whole utterances.")
+
+    def close(self):
+        pass
+
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+
+    def __init__(self, recognizer: sr.Recognizer, language: str = "en-US"):
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            logging.error(f"Could not request results from Google Speech Recognition service; {e}")
+            return None
+
+class _VoskStream(RecognitionStream):
+    def __init__(self, model, sample_rate: int):
+        self._recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        # Vosk closes a segment at each pause it detects inside the utterance.
+        self._segments: List[str] = []
+
+    def _text(self, current: str) -> str:
+        return " ".join(part for part in self._segments + [current] if part)
+
+    def accept(self, pcm: memoryview) -> str:
+        if self._recognizer.AcceptWaveform(bytes(pcm)):
+            self._segments.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return self._text("")
+        return self._text(json.loads(self._recognizer.PartialResult()).get("partial", ""))
+
+    def finish(self) -> Optional[str]:
+        return self._text(json.loads(self._recognizer.FinalResult()).get("text", "")) or None
+
+class VoskBackend(RecognizerBackend):
+    """Offline recognition on the CPU with a local Vosk model; no network round trip."""
+    name = "vosk"
+    streaming = True
+    sample_rate = 16000
+
+    def __init__(self, model_path: str):
+        if vosk is None:
+            raise ImportError("The offline recognizer requires the vosk package.")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        # KaldiRecognizer is not thread-safe, so each utterance gets its own; the model is shared.
+        recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        return json.loads(recognizer.FinalResult()).get("text") or None
+
+    def start_stream(self, sample_rate: int) -> RecognitionStream:
+        return _VoskStream(self.model, sample_rate)
+
+class _StubStream(RecognitionStream):
+    def __init__(self, backend: "StubBackend"):
+        self._backend = backend
+        self._revealed = 0
+
+    def accept(self, pcm: memoryview) -> str:
+        # One more word per chunk fed, so partials are deterministic for a given chunk size.
+        words = (self._backend.peek() or "").split()
+        self._revealed = min(len(words), self._revealed + 1)
+        return " ".join(words[:self._revealed])
+
+    def finish(self) -> Optional[str]:
+        return self._backend._next()
+
+class StubBackend(RecognizerBackend):
+    """Returns scripted transcripts in order, whatever the audio, after a fixed delay.
+
+    A transcript is only used up by a finished recognition, so utterances that are dropped
+    midway do not shift the script.
+    """
+    name = "stub"
+    streaming = True
+
+    def __init__(self, transcripts: List[str], latency: float = 0.0):
+        self.latency = latency
+        self._transcripts = list(transcripts)
+        self._position = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, latency: float = 0.0) -> "StubBackend":
+        with open(path, encoding="utf-8") as f:
+            return cls([line.strip() for line in f if line.strip() and not line.startswith("#")], latency)
+
+    def peek(self) -> Optional[str]:
+        with self._lock:
+            return self._transcripts[self._position] if self._position < len(self._transcripts) else None
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        return self._next()
+
+    def _next(self) -> Optional[str]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self._position >= len(self._transcripts):
+                return None
+            self._position += 1
+            return self._transcripts[self._position - 1]
+
+    def start_stream(self, sample_rate: int) -> RecognitionStream:
+        return _StubStream(self)
+
+def create_backend(settings: SpeechSettings, recognizer: sr.Recognizer) -> RecognizerBackend:
+    """Builds the configured backend, falling back to Google if an offline engine is unavailable."""
+    if settings.backend == "stub":
+        if not settings.stub_transcripts_file:
+            return StubBackend([], settings.stub_latency)
+        return StubBackend.from_file(settings.stub_transcripts_file, settings.stub_latency)
+    if settings.backend == "vosk":
+        try:
+            return VoskBackend(settings.vosk_model_path)
+        except Exception as e:  # Missing package or model directory.
+            logging.warning(f"Offline recognizer unavailable, using Google instead: {e}")
+    elif settings.backend != "google":
+        logging.warning(f"Unknown speech backend '{settings.backend}', using Google.")
+    return GoogleBackend(recognizer, settings.language)
@@ -1,53 +1,303 @@
 # ==============================================================================
 # File: services/speech_recognizer.py
 # ==============================================================================
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, List, Optional, Tuple
+
+import speech_recognition as sr
+
+from core.config import SpeechSettings
+from services.audio_capture import (
+    BufferOverrunError, ContinuousCapture, MicrophoneSource, NoiseFloorEstimator, WavFileSource,
+)
+from services.recognizer_backends import create_backend
+from services.voice_activity import VoiceActivityDetector
+from utils.histogram import WindowedHistogram
+
 class SpeechRecognizer:
     """Enhanced speech recognition service."""
     def __init__(self, settings: SpeechSettings):
         self.settings = settings
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = None if settings.audio_file else sr.Microphone()
         self.recognizer.energy_threshold = settings.energy_threshold
         self.recognizer.pause_threshold = settings.pause_threshold
+        # Stage durations of the most recent listen(), for per-command tracing.
+        self.last_timings = {}
+        # Wall-clock (start, end) of the speech behind the most recent transcript, if known.
+        self.last_heard: Optional[Tuple[float, float]] = None
+        self.capture: Optional[ContinuousCapture] = None
+        self.vad = VoiceActivityDetector() if settings.vad_enabled else None
+        self.backend = create_backend(settings, self.recognizer)
+        self.backend_latency = defaultdict(WindowedHistogram)
+        # Pipeline: a capture stage feeds a recognition stage through bounded queues.
+        self._audio_queue: Optional[queue.Queue] = None
+        self._results: Optional[queue.Queue] = None
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        # Set when the backend follows each phrase as it is captured and reports partials.
+        self.streams_partials = False
 
     async def initialize(self):
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._calibrate)
+        calibrated = self.microphone is not None and self.settings.calibration_seconds > 0
+        if calibrated:
+            await loop.run_in_executor(None, self._calibrate)
+        if self.settings.continuous_capture or self.settings.audio_file:
+            source = self._open_source()
+            self.streams_partials = (
+                self.settings.pipeline and self.settings.partial_results
+                and self.backend.streaming and source.sample_width == 2
+            )
+            noise_estimator = None
+            if self.settings.adaptive_noise:
+                noise_estimator = NoiseFloorEstimator(
+                    self.recognizer, source.sample_rate / self.settings.capture_chunk_frames,
+                    window_seconds=self.settings.noise_window_seconds, alpha=self.settings.noise_ema_alpha,
+                    min_threshold=self.settings.min_energy_threshold,
+                    # Start from the calibrated level; otherwise the first window sets it.
+                    initial_floor=self.recognizer.energy_threshold / self.recognizer.dynamic_energy_ratio
+                    if calibrated else None,
+                )
+            self.capture = ContinuousCapture(
+                source, self.recognizer,
+                buffer_seconds=self.settings.capture_buffer_seconds,
+                chunk_frames=self.settings.capture_chunk_frames,
+                pre_roll=self.settings.capture_pre_roll,
+                phrase_time_limit=self.settings.phrase_time_limit,
+                noise_estimator=noise_estimator,
+                stream_phrases=self.streams_partials,
+            )
+            self.capture.start()
+        if self.settings.pipeline:
+            self._results = queue.Queue(maxsize=self.settings.pipeline_queue_size)
+            if self.capture is None:
+                # Without continuous capture, a thread of its own keeps listening.
+                self._audio_queue = queue.Queue(maxsize=self.settings.pipeline_queue_size)
+                self._start_worker(self._capture_loop, "jarvis-speech-capture")
+            self._start_worker(self._recognize_loop, "jarvis-speech-recognize")
+
+    def _start_worker(self, target, name: str):
+        worker = threading.Thread(target=target, name=name, daemon=True)
+        worker.start()
+        self._workers.append(worker)
+
+    def _open_source(self):
+        if self.settings.audio_file:
+            logging.info(f"Reading speech from {self.settings.audio_file}.")
+            return WavFileSource(self.settings.audio_file, realtime=self.settings.audio_file_realtime)
+        return MicrophoneSource(self.microphone)
 
     def _calibrate(self):
         with self.microphone as source:
             logging.info("Calibrating for ambient noise, please be quiet...")
-            self.recognizer.adjust_for_ambient_noise(source, duration=2)
+            self.recognizer.adjust_for_ambient_noise(source, duration=self.settings.calibration_seconds)
             logging.info("Calibration complete.")
 
-    async def listen(self) -> Optional[str]:
+    async def listen(self, on_partial: Optional[Callable[[Optional[str]], None]] = None) -> Optional[str]:
+        """Returns the next final transcript, or None if none arrives within the timeout.
+
+        While a streaming backend is still recognizing, on_partial is called with each new
+        partial transcript, and with None if the utterance is then dropped without a result.
+        """
         loop = asyncio.get_running_loop()
-        audio = await loop.run_in_executor(None, self._listen_blocking)
-        if audio:
+        started = time.perf_counter()
+        self.last_heard = None
+        if self._results is not None:
+            while True:
+                result = await loop.run_in_executor(None, self._next_result_blocking)
+                if result is None or result[0] == "final":
+                    break
+                if on_partial is not None:
+                    on_partial(result[1])
+            waited = time.perf_counter() - started
+            if result is None:
+                self.last_timings = {"listen": waited}
+                return None
+            _, text, recognize_time, self.last_heard = result
+            # Recognition overlapped the wait, so only the remainder was spent listening.
+            self.last_timings = {"listen": max(0.0, waited - recognize_time), "recognize": recognize_time}
+            return text
+        heard = await loop.run_in_executor(None, self._listen_blocking)
+        listened = time.perf_counter()
+        self.last_timings = {"listen": listened - started}
+        if heard:
+            audio, self.last_heard = heard
             text = await loop.run_in_executor(None, self._recognize_blocking, audio)
+            self.last_timings["recognize"] = time.perf_counter() - listened
             return text
         return None
 
+    def _next_result_blocking(self):
+        try:
+            return self._results.get(timeout=self.settings.timeout)
+        except queue.Empty:
+            return None
+
+    def _put(self, stage: queue.Queue, item) -> bool:
+        # Blocking put, so a slow stage holds back the one before it.
+        while not self._stop.is_set():
+            try:
+                stage.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            heard = self._listen_blocking()
+            if heard is not None:
+                self._put(self._audio_queue, heard)
+
+    def _next_audio_blocking(self):
+        if self._audio_queue is None:
+            return self._listen_blocking()
+        try:
+            return self._audio_queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+    def _recognize_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._recognize_next_blocking()
+            except Exception as e:
+                # One bad utterance or backend hiccup must not end recognition for the session.
+                logging.error(f"Speech recognition failed: {e!r}")
+                self._stop.wait(0.1)
+
+    def _recognize_next_blocking(self):
+        if self.streams_partials:
+            self._recognize_streaming_blocking()
+            return
+        heard = self._next_audio_blocking()
+        if heard is None:
+            return
+        audio, interval = heard
+        started = time.perf_counter()
+        text = self._recognize_blocking(audio)
+        if text:
+            self._put(self._results, ("final", text, time.perf_counter() - started, interval))
+
+    def _put_partial(self, text: Optional[str]):
+        # Partials are advisory: drop one rather than hold up recognition.
+        try:
+            self._results.put_nowait(("partial", text, None, None))
+        except queue.Full:
+            pass
+
+    def _recognize_streaming_blocking(self):
+        """Feeds a phrase to the backend while it is being spoken, passing on partial transcripts."""
+        utterance = self.capture.next_utterance(timeout=0.5)
+        if utterance is None:
+            return
+        stream = self.backend.start_stream(utterance.sample_rate)
+        fed, partial = utterance.start, ""
+        try:
+            while True:
+                finished = utterance.wait(0.05)
+                end = utterance.end
+                if end > fed:
+                    for view in utterance.buffer.views(fed, end):
+                        latest = stream.accept(view)
+                    fed = end
+                    if latest and latest != partial:
+                        partial = latest
+                        self._put_partial(partial)
+                if finished:
+                    break
+                if self._stop.is_set():
+                    return
+            if utterance.discarded or not self._is_speech(utterance.views(), utterance.sample_rate,
+                                                          utterance.sample_width):
+                text = None
+            else:
+                # Only the tail is left to decode, so this is the wait the user notices.
+                started = time.perf_counter()
+                text = stream.finish()
+                recognize_time = time.perf_counter() - started
+                self.backend_latency[self.backend.name].record(recognize_time)
+        except BufferOverrunError:
+            logging.warning("Dropped an utterance that was overwritten before it could be recognized.")
+            text = None
+        if text:
+            print(f"Recognized: {text}")
+            heard = (utterance.captured_at, utterance.ended_at)
+            self._put(self._results, ("final", text.lower(), recognize_time, heard))
+        elif partial:
+            self._put_partial(None)
+
     def _listen_blocking(self):
+        """The next phrase that passes the voice-activity gate, with the interval it was heard in."""
+        if self.capture is not None:
+            return self._next_captured_blocking()
         with self.microphone as source:
             try:
                 print("Listening...")
-                return self.recognizer.listen(
+                audio = self.recognizer.listen(
                     source, timeout=self.settings.timeout, phrase_time_limit=self.settings.phrase_time_limit
                 )
             except sr.WaitTimeoutError:
                 return None
+        if not self._is_speech((memoryview(audio.frame_data),), audio.sample_rate, audio.sample_width):
+            return None
+        ended = time.time()
+        return audio, (ended - len(audio.frame_data) / (audio.sample_rate * audio.sample_width), ended)
 
-    def _recognize_blocking(self, audio):
+    def _next_captured_blocking(self):
+        utterance = self.capture.next_utterance(timeout=self.settings.timeout)
+        if utterance is None:
+            return None
         try:
-            text = self.recognizer.recognize_google(audio)
-            print(f"Recognized: {text}")
-            return text.lower()
-        except sr.UnknownValueError:
+            if not self._is_speech(utterance.views(), utterance.sample_rate, utterance.sample_width):
+                return None
+            return utterance.to_audio_data(), (utterance.captured_at, utterance.ended_at)
+        except BufferOverrunError:
+            logging.warning("Dropped an utterance that was overwritten before it could be recognized.")
             return None
-        except sr.RequestError as e:
-            logging.error(f"Could not request results from Google Speech Recognition service; {e}")
+
+    def _is_speech(self, views, sample_rate: int, sample_width: int) -> bool:
+        if self.vad is None:
+            return True
+        return self.vad.is_speech(views, sample_rate, sample_width, self.recognizer.energy_threshold)
+
+    def vad_stats(self) -> dict:
+        """Utterances the voice-activity gate passed on or rejected, by reason."""
+        return self.vad.stats() if self.vad is not None else {}
+
+    def _recognize_blocking(self, audio):
+        started = time.perf_counter()
+        try:
+            text = self.backend.recognize(audio)
+        finally:
+            self.backend_latency[self.backend.name].record(time.perf_counter() - started)
+        if not text:
             return None
+        print(f"Recognized: {text}")
+        return text.lower()
+
+    def recognition_stats(self, window: Optional[str] = None) -> dict:
+        """Per-backend recognition latency (p50/p90/p99/max) and voice-activity gate counts."""
+        return {
+            "backends": {name: hist.snapshot(window).summary() for name, hist in self.backend_latency.items()},
+            "vad": self.vad_stats(),
+        }
 
     async def close(self):
-        pass
+        loop = asyncio.get_running_loop()
+        self._stop.set()
+        # Stopping capture first wakes a recognition worker waiting for the next utterance.
+        if self.capture is not None:
+            await loop.run_in_executor(None, self.capture.stop)
+        for worker in self._workers:
+            await loop.run_in_executor(None, worker.join, 2)
+        self._workers.clear()
+        self.capture = None
+        self.backend.close()
+        logging.info(f"Speech recognition: {self.recognition_stats()}")
@@ -0,0 +1,23 @@
+# ==============================================================================
+# File: services/system_service.py
+# Description: CPU and memory figures from the background system sampler.
+# ==============================================================================
+import asyncio
+
+from core.exceptions import ServiceUnavailableError
+from utils.deadline import within_deadline
+from utils.system_sampler import SystemSampler
+
+class SystemService:
+    def __init__(self, sampler: SystemSampler):
+        self.sampler = sampler
+
+    async def get_system_info(self):
+        sample = self.sampler.latest()
+        if sample is None:
+            loop = asyncio.get_running_loop()
+            await within_deadline(loop.run_in_executor(None, self.sampler.wait_until_ready, 2.0), "system.info")
+            sample = self.sampler.latest()
+        if sample is None:
+            raise ServiceUnavailableError("No system sample is available yet.")
+        return {"cpu": sample.cpu_percent, "memory": sample.memory_percent}
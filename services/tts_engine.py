@@ -3,21 +3,188 @@
 # Description: Handles Text-to-Speech synthesis and playback using Edge-TTS.
 # ==============================================================================
 import asyncio
+import io
+import re
 import edge_tts
 import pygame
-import tempfile
-import os
 import logging
-from typing import Dict
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from core.config import VoiceSettings
+from core.exceptions import TTSError
+from utils.audio_cache import AudioCache
+from utils.deadline import deadline_paused, within_deadline
+from utils.tracing import span
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+# How often the event loop checks whether playback has finished.
+PLAYBACK_POLL_INTERVAL = 0.02
+# Playback intervals kept for telling echoes of JARVIS's own voice from commands.
+PLAYBACK_HISTORY = 16
+# edge-tts produces 24 kHz mono MP3; mixing in that format means speech is never resampled.
+MIXER_SAMPLE_RATE = 24000
+
 @dataclass
 class EmotionalParameters:
     rate: str; pitch: str; volume: str
 
+# Layer III bitrates in kbit/s by MPEG version (3: MPEG-1, 2: MPEG-2 and 2.5) and sample rates by version bits.
+_MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# Frames decoded ahead of each streamed segment so the decoder state matches a whole-file decode.
+_PRIMER_FRAMES = 4
+
+@dataclass
+class _Mp3Frame:
+    offset: int
+    length: int
+    samples: int
+    sample_rate: int
+    side_info_offset: int
+    side_info_bytes: int
+    mpeg1: bool
+
+def _parse_mp3_frame(data: bytearray, offset: int) -> Optional[_Mp3Frame]:
+    """The Layer III frame whose header starts at offset, or None if there is no valid header."""
+    header = data[offset:offset + 4]
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version, layer = (header[1] >> 3) & 3, (header[1] >> 1) & 3
+    bitrate_index, rate_index = header[2] >> 4, (header[2] >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[3 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    mono = header[3] >> 6 == 3
+    return _Mp3Frame(
+        offset=offset,
+        length=(144 if mpeg1 else 72) * bitrate // sample_rate + ((header[2] >> 1) & 1),
+        samples=1152 if mpeg1 else 576,
+        sample_rate=sample_rate,
+        side_info_offset=4 if header[1] & 1 else 6,  # A CRC follows the header when bit 0 is clear.
+        side_info_bytes=(17 if mono else 32) if mpeg1 else (9 if mono else 17),
+        mpeg1=mpeg1,
+    )
+
+class _Mp3StreamDecoder:
+    """Turns a streamed MP3 into PCM segments that play back to back on a mixer channel.
+
+    pygame's music player needs the size of the whole file before it starts, so streamed
+    audio is decoded in pieces instead. A piece cut out of a stream does not decode on its
+    own: Layer III frames borrow bits from earlier frames and overlap with their neighbours.
+    Each segment is therefore decoded after a few primer frames whose output is dropped. The
+    first two primers are muted, keeping only the second's reservoir pointer, so the decoder
+    never reaches back past the data it was given.
+    """
+    def __init__(self):
+        self.data = bytearray()
+        self.frames: List[_Mp3Frame] = []
+        self._scan = 0
+        self._decoded = 0
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes of complete frames not yet handed out as PCM."""
+        if self._decoded == len(self.frames):
+            return 0
+        last = self.frames[-1]
+        return last.offset + last.length - self.frames[self._decoded].offset
+
+    def feed(self, chunk: bytes):
+        self.data.extend(chunk)
+        while self._scan + 4 <= len(self.data):
+            frame = _parse_mp3_frame(self.data, self._scan)
+            if frame is None:
+                self._scan += 1  # Not a header; resynchronize on the next one.
+                continue
+            if frame.offset + frame.length > len(self.data):
+                break
+            body = self.data[frame.offset:frame.offset + frame.length]
+            # A leading Xing/Info frame only carries metadata about the whole file.
+            if self.frames or (b"Xing" not in body and b"Info" not in body):
+                self.frames.append(frame)
+            self._scan += frame.length
+
+    def _frame_bytes(self, frame: _Mp3Frame, mute: bool, keep_reservoir_pointer: bool) -> bytes:
+        body = bytes(self.data[frame.offset:frame.offset + frame.length])
+        if not mute:
+            return body
+        start, end = frame.side_info_offset, frame.side_info_offset + frame.side_info_bytes
+        side_info = bytearray(end - start)
+        if keep_reservoir_pointer:
+            side_info[0] = body[start]
+            if frame.mpeg1:
+                side_info[1] = body[start + 1] & 0x80  # The pointer is 9 bits wide in MPEG-1.
+        return body[:start] + bytes(side_info) + body[end:]
+
+    def decode(self) -> Optional[pygame.mixer.Sound]:
+        """PCM for every complete frame received since the last call, or None if there is none.
+
+        SDL does not recognise a single frame as MP3, so a lone first frame waits for the next.
+        """
+        start, end = self._decoded, len(self.frames)
+        first = max(0, start - _PRIMER_FRAMES)
+        if start == end or end - first < 2:
+            return None
+        parts = [
+            self._frame_bytes(self.frames[i], mute=first > 0 and i - first < 2, keep_reservoir_pointer=i > first)
+            for i in range(first, end)
+        ]
+        raw = pygame.mixer.Sound(file=io.BytesIO(b"".join(parts))).get_raw()
+        frequency, size, channels = pygame.mixer.get_init()
+        samples = sum(frame.samples * frequency / frame.sample_rate for frame in self.frames[start:end])
+        keep = round(samples) * channels * (abs(size) // 8)
+        self._decoded = end
+        return pygame.mixer.Sound(buffer=raw[-keep:])
+
+class PlaybackHandle:
+    """An utterance being synthesized or played. Await it, or cancel() it to cut it short.
+
+    Awaiting resolves to True when playback finished and False when it was cancelled.
+    """
+    def __init__(self, task: asyncio.Task):
+        self._task = task
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+        task.add_done_callback(self._on_task_done)
+        self.done.add_done_callback(self._on_done)
+
+    def cancel(self):
+        self._task.cancel()
+
+    def _on_task_done(self, task: asyncio.Task):
+        if self.done.done():
+            return
+        if task.cancelled():
+            self.done.set_result(False)
+        elif task.exception() is not None:
+            self.done.set_exception(task.exception())
+        else:
+            self.done.set_result(True)
+
+    def _on_done(self, future: asyncio.Future):
+        # A caller cancelled while awaiting us; stop the utterance as well.
+        if future.cancelled():
+            self._task.cancel()
+
+    def __await__(self):
+        return self.done.__await__()
+
 class TTSEngine:
     """Enhanced TTS engine."""
     def __init__(self, settings: VoiceSettings):
         self.settings = settings
-        pygame.mixer.init()
+        pygame.mixer.init(frequency=MIXER_SAMPLE_RATE, size=-16, channels=1, allowedchanges=0)
+        # Streamed speech is queued on a channel of its own, away from any sound effects.
+        pygame.mixer.set_reserved(1)
+        self._speech_channel = pygame.mixer.Channel(0)
         self.emotion_params = {
             "professional": EmotionalParameters(rate="+0%", pitch="+0Hz", volume="+0%"),
             "happy": EmotionalParameters(rate="+10%", pitch="+20Hz", volume="+5%"),
@@ -25,23 +192,271 @@ class TTSEngine:
             "concerned": EmotionalParameters(rate="-5%", pitch="-10Hz", volume="+0%"),
             "calm": EmotionalParameters(rate="-15%", pitch="-30Hz", volume="-5%"),
         }
+        self.audio_cache = (
+            AudioCache(settings.audio_cache_dir, settings.audio_cache_max_bytes)
+            if settings.audio_cache_enabled else None
+        )
+        self._playback_lock = asyncio.Lock()
+        self._handles = set()
+        # Wall-clock (start, end) of recent playback; playback is serialized by the lock.
+        self._playback_intervals = deque(maxlen=PLAYBACK_HISTORY)
+        self._playback_started: Optional[float] = None
+
+    @property
+    def is_speaking(self) -> bool:
+        return bool(self._handles)
+
+    def speak(self, text: str, emotion: str = "professional") -> PlaybackHandle:
+        return self._start(self._speak(text, emotion))
+
+    def speak_sequence(self, items: Iterable[Tuple[str, str]]) -> PlaybackHandle:
+        """Speaks (text, emotion) items back to back, synthesizing ahead while one plays."""
+        return self._start(self._speak_sequence(list(items)))
+
+    def played_during(self, start: float, end: float, tail: float = 0.0) -> bool:
+        """Whether speech was playing at any point between wall-clock times start and end.
+
+        Each playback counts as lasting `tail` seconds longer, for output latency and reverb.
+        """
+        if self._playback_started is not None and self._playback_started <= end:
+            return True
+        return any(played < end and start < stopped + tail for played, stopped in self._playback_intervals)
+
+    @contextmanager
+    def _playing(self):
+        self._playback_started = time.time()
+        try:
+            yield
+        finally:
+            self._playback_intervals.append((self._playback_started, time.time()))
+            self._playback_started = None
+
+    def stop(self):
+        """Cancels every queued or playing utterance."""
+        for handle in list(self._handles):
+            handle.cancel()
+
+    def _start(self, coro) -> PlaybackHandle:
+        handle = PlaybackHandle(asyncio.create_task(coro))
+        self._handles.add(handle)
+        handle.done.add_done_callback(lambda _: self._handles.discard(handle))
+        return handle
+
+    async def _await_playback_end(self):
+        # Polled from the event loop: SDL's event queue may only be used from the main
+        # thread, so no worker thread can wait on a music end event.
+        try:
+            with deadline_paused():
+                while pygame.mixer.music.get_busy():
+                    await asyncio.sleep(PLAYBACK_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            pygame.mixer.music.stop()
+            raise
 
-    async def speak(self, text: str, emotion: str = "professional"):
+    async def _speak(self, text: str, emotion: str):
         if not text: return
         params = self.emotion_params.get(emotion, self.emotion_params["professional"])
-        communicate = edge_tts.Communicate(
+        key = self._cache_key(text, params)
+        cached = self.audio_cache.get(key) if self.audio_cache is not None else None
+        if cached is not None:
+            await self._play_audio(cached)
+        elif self.settings.streaming:
+            async with self._playback_lock:
+                audio = await self._stream_and_play(text, params)
+            if self.audio_cache is not None and audio:
+                await self._store_in_cache(key, audio)
+        else:
+            await self._play_audio(await self._synthesize_audio(key, text, params))
+
+    def _communicate(self, text: str, params: EmotionalParameters) -> edge_tts.Communicate:
+        return edge_tts.Communicate(
             text, self.settings.voice, rate=params.rate, pitch=params.pitch, volume=params.volume
         )
-        
-        # Using a context manager for tempfile is safer
-        with tempfile.NamedTemporaryFile(delete=True, suffix=".mp3") as tmp_file:
-            await communicate.save(tmp_file.name)
-            pygame.mixer.music.load(tmp_file.name)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                await asyncio.sleep(0.1)
+
+    async def _synthesize(self, text: str, params: EmotionalParameters) -> bytes:
+        with span("tts.synthesize", chars=len(text)):
+            return await within_deadline(self._collect_audio(text, params), "tts.synthesize")
+
+    async def _collect_audio(self, text: str, params: EmotionalParameters) -> bytes:
+        audio = bytearray()
+        async for chunk in self._communicate(text, params).stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        return bytes(audio)
+
+    def _cache_key(self, text: str, params: EmotionalParameters) -> str:
+        return AudioCache.make_key(text, self.settings.voice, params.rate, params.pitch, params.volume)
+
+    async def _store_in_cache(self, key: str, audio: bytes):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.audio_cache.put, key, audio)
+
+    async def _feed_stream(self, text: str, params: EmotionalParameters,
+                           decoder: "_Mp3StreamDecoder", segments: asyncio.Queue) -> bytes:
+        # The first segment waits for the jitter buffer to fill; later ones are smaller.
+        threshold = self.settings.stream_prebuffer_bytes
+        try:
+            async for chunk in self._communicate(text, params).stream():
+                if chunk["type"] == "audio":
+                    decoder.feed(chunk["data"])
+                    if decoder.pending_bytes >= threshold:
+                        segments.put_nowait(decoder.decode())
+                        threshold = self.settings.stream_segment_bytes
+            segment = decoder.decode()
+            if segment is not None:
+                segments.put_nowait(segment)
+        finally:
+            segments.put_nowait(None)
+        return bytes(decoder.data)
+
+    async def _stream_and_play(self, text: str, params: EmotionalParameters) -> bytes:
+        """Plays audio as edge-tts streams it, once the jitter buffer has filled."""
+        decoder = _Mp3StreamDecoder()
+        segments: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.create_task(self._feed_stream(text, params, decoder, segments))
+        try:
+            with span("tts.first_audio"):
+                first = await within_deadline(segments.get(), "tts.first_audio")
+            if first is None:
+                await producer
+                raise TTSError(f"No audio was synthesized for: {text!r}")
+            with span("tts.playback", streamed=True):
+                await self._play_segments(first, segments)
+            return await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def _play_segments(self, first: pygame.mixer.Sound, segments: asyncio.Queue):
+        """Plays decoded segments back to back until the producer signals the end with None."""
+        channel = self._speech_channel
+        channel.play(first)
+        upcoming, finished = None, False
+        try:
+            with deadline_paused(), self._playing():
+                while not finished or channel.get_busy() or channel.get_queue() is not None:
+                    if upcoming is None and not finished:
+                        try:
+                            upcoming = segments.get_nowait()
+                        except asyncio.QueueEmpty:
+                            pass
+                        else:
+                            finished = upcoming is None
+                    # A channel holds one queued sound, which starts at once if the channel ran dry.
+                    if upcoming is not None and channel.get_queue() is None:
+                        channel.queue(upcoming)
+                        upcoming = None
+                    await asyncio.sleep(PLAYBACK_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            channel.stop()
+            raise
+
+    async def _speak_sequence(self, items: List[Tuple[str, str]]):
+        segments = deque(
+            (sentence, emotion) for text, emotion in items if text
+            for sentence in self._split_sentences(text)
+        )
+        pending = deque()
+
+        def schedule():
+            text, emotion = segments.popleft()
+            params = self.emotion_params.get(emotion, self.emotion_params["professional"])
+            pending.append(asyncio.create_task(self._prepare(text, params)))
+
+        try:
+            # `lookahead` syntheses run ahead of playback: the loop below tops up one per segment played.
+            while segments and len(pending) < max(1, self.settings.lookahead):
+                schedule()
+            async with self._playback_lock:
+                while pending:
+                    audio = await pending.popleft()
+                    if segments:
+                        schedule()
+                    await self._play_audio(audio, locked=True)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _split_sentences(self, text: str) -> List[str]:
+        """Splits long text on sentence boundaries into chunks of at most sentence_split_chars."""
+        limit = self.settings.sentence_split_chars
+        if len(text) <= limit:
+            return [text]
+        chunks, current = [], ""
+        for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+            if current and len(current) + 1 + len(sentence) > limit:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _prepare(self, text: str, params: EmotionalParameters):
+        """Returns a cached file path, or the raw synthesized bytes when caching is off."""
+        key = self._cache_key(text, params)
+        if self.audio_cache is not None:
+            cached = self.audio_cache.get(key)
+            if cached is not None:
+                return cached
+        return await self._synthesize_audio(key, text, params)
+
+    async def _synthesize_audio(self, key: str, text: str, params: EmotionalParameters):
+        audio = await self._synthesize(text, params)
+        if not audio:
+            raise TTSError(f"No audio was synthesized for: {text!r}")
+        if self.audio_cache is not None:
+            return await self._store_in_cache(key, audio)
+        return audio
+
+    async def _play_audio(self, audio, locked: bool = False):
+        if not locked:
+            async with self._playback_lock:
+                return await self._play_audio(audio, locked=True)
+        if isinstance(audio, bytes):
+            pygame.mixer.music.load(io.BytesIO(audio), "mp3")
+        else:
+            pygame.mixer.music.load(str(audio))
+        pygame.mixer.music.play()
+        with span("tts.playback"), self._playing():
+            await self._await_playback_end()
+
+    async def _synthesize_into_cache(self, text: str, params: EmotionalParameters) -> bool:
+        """Caches the audio for text unless it is there already; True if it was synthesized."""
+        key = self._cache_key(text, params)
+        if key in self.audio_cache:
+            return False
+        try:
+            audio = await self._synthesize(text, params)
+        except Exception as e:
+            logging.warning(f"Audio pre-synthesis failed for {text!r}: {e}")
+            return False
+        if not audio:
+            return False
+        await self._store_in_cache(key, audio)
+        return True
+
+    async def presynthesize(self, text: str, emotion: str = "professional"):
+        """Synthesizes text into the audio cache ahead of speak(), e.g. for a speculative response."""
+        if self.audio_cache is None or not text: return
+        params = self.emotion_params.get(emotion, self.emotion_params["professional"])
+        await self._synthesize_into_cache(text, params)
+
+    async def prewarm(self, phrases: Iterable[str]):
+        """Synthesizes every phrase for every emotion preset into the audio cache."""
+        if self.audio_cache is None: return
+        synthesized = 0
+        for text in phrases:
+            for params in self.emotion_params.values():
+                if await self._synthesize_into_cache(text, params):
+                    synthesized += 1
+        logging.info(f"Audio cache pre-warm complete ({synthesized} new entries): {self.audio_cache.stats()}")
 
     async def close(self):
+        self.stop()
         pygame.mixer.quit()
         
 ''' -----------Or use this -----------
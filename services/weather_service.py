@@ -0,0 +1,45 @@
+# ==============================================================================
+# File: services/weather_service.py
+# Description: Current conditions from the OpenWeatherMap API.
+# ==============================================================================
+import asyncio
+
+import aiohttp
+
+from core.exceptions import ServiceUnavailableError
+from utils.http_client import HttpClient
+from utils.rate_limiter import RateLimiter
+from utils.tracing import span
+
+class WeatherService:
+    def __init__(self, api_key: str, http_client: HttpClient, rate_limiter: RateLimiter, max_wait: float):
+        self.api_key = api_key
+        self.http_client = http_client
+        self.rate_limiter = rate_limiter
+        self.rate_limit_key = f"openweather:{api_key}"
+        self.max_wait = max_wait
+        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+
+    async def get_weather(self, location: str):
+        if not self.api_key: raise ServiceUnavailableError("Weather API key not set.")
+        params = {"q": location, "appid": self.api_key, "units": "metric"}
+        if not await self.rate_limiter.acquire(self.rate_limit_key, self.max_wait):
+            raise ServiceUnavailableError("Weather API rate limit reached.")
+        try:
+            with span("weather.http"):
+                async with self.http_client.get(self.base_url, params=params) as response:
+                    if response.status != 200:
+                        raise ServiceUnavailableError(f"Weather API returned status {response.status}")
+                    data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ServiceUnavailableError(f"Weather API request failed: {e!r}") from e
+        except ValueError as e:
+            raise ServiceUnavailableError(f"Weather API returned invalid JSON: {e!r}") from e
+        try:
+            return {
+                "location": data["name"],
+                "temperature": round(data["main"]["temp"]),
+                "description": data["weather"][0]["description"],
+            }
+        except (KeyError, IndexError, TypeError) as e:
+            raise ServiceUnavailableError(f"Weather API returned an unexpected payload: {e!r}") from e
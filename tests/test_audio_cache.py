@@ -0,0 +1,68 @@
+import os
+import threading
+
+from utils.audio_cache import AudioCache
+
+def test_keys_cover_the_whole_synthesis_request():
+    key = AudioCache.make_key("Hello", "en-GB-RyanNeural", "+0%", "+0Hz", "+0%")
+    assert key == AudioCache.make_key("Hello", "en-GB-RyanNeural", "+0%", "+0Hz", "+0%")
+    assert key != AudioCache.make_key("Hello", "en-GB-RyanNeural", "+10%", "+0Hz", "+0%")
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    cache.put("a", b"x" * 8)
+    cache.put("b", b"x" * 8)
+    assert cache.get("a") is not None
+    cache.put("c", b"x" * 8)
+    assert "b" not in cache and not cache.path_for("b").exists()
+    assert "a" in cache and "c" in cache
+    assert cache.stats()["bytes"] == 16
+
+def test_an_oversized_entry_is_kept_alone(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"x" * 5)
+    cache.put("big", b"x" * 50)
+    assert "a" not in cache
+    assert cache.get("big").read_bytes() == b"x" * 50
+
+def test_lru_order_survives_a_restart(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    for i, key in enumerate(("old", "new")):
+        path = cache.put(key, b"x" * 8)
+        os.utime(path, (1000 + i, 1000 + i))
+    reopened = AudioCache(str(tmp_path), max_bytes=12)
+    assert "old" not in reopened and "new" in reopened
+
+def test_a_file_deleted_behind_the_cache_is_a_miss(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    cache.put("a", b"audio")
+    cache.path_for("a").unlink()
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 1, "hit_rate": 0.0}
+
+def test_concurrent_puts_and_gets_keep_the_index_consistent(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=64 * 40)
+    errors = []
+
+    def worker(seed):
+        try:
+            for i in range(200):
+                key = f"k{(seed * 7 + i) % 60}"
+                if i % 3:
+                    cache.put(key, b"x" * 64)
+                else:
+                    cache.get(key)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    stats = cache.stats()
+    assert stats["bytes"] == 64 * stats["entries"] <= cache.max_bytes
+    on_disk = {path.stem for path in tmp_path.glob("*.mp3")}
+    assert on_disk == {key for key in on_disk if key in cache} and len(on_disk) == stats["entries"]
+    assert not list(tmp_path.glob("*.tmp"))
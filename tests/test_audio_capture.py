@@ -0,0 +1,69 @@
+import wave
+
+import numpy as np
+import pytest
+
+from services.audio_capture import AudioRingBuffer, BufferOverrunError, WavFileSource, _chunk_rms
+
+def _read(buffer: AudioRingBuffer, start: int, end: int) -> bytes:
+    return b"".join(bytes(view) for view in buffer.views(start, end))
+
+def test_writes_wrap_around_and_read_back_in_order():
+    buffer = AudioRingBuffer(10, 2)
+    buffer.write(b"abcdefgh")
+    buffer.write(b"ijklmn")
+    assert buffer.write_pos == 14 and buffer.oldest_pos == 4
+    views = buffer.views(6, 14)
+    assert len(views) == 2
+    assert b"".join(bytes(view) for view in views) == b"ghijklmn"
+
+def test_views_are_zero_copy():
+    buffer = AudioRingBuffer(8, 2)
+    buffer.write(b"abcd")
+    view = buffer.views(0, 4)[0]
+    buffer.write(b"efgh")
+    assert view.obj is buffer.views(4, 8)[0].obj
+
+def test_overwritten_audio_raises():
+    buffer = AudioRingBuffer(8, 2)
+    buffer.write(b"abcdefgh")
+    buffer.write(b"ij")
+    with pytest.raises(BufferOverrunError):
+        buffer.views(0, 4)
+    assert _read(buffer, 2, 10) == b"cdefghij"
+
+def test_a_write_larger_than_the_buffer_keeps_its_tail():
+    buffer = AudioRingBuffer(8, 2)
+    buffer.write(b"0123456789ab")
+    assert buffer.write_pos == 12
+    assert _read(buffer, 4, 12) == b"456789ab"
+
+def test_capacity_is_whole_frames():
+    assert AudioRingBuffer(11, 2).capacity == 10
+
+def test_chunk_rms_matches_the_definition():
+    samples = np.random.default_rng(3).integers(-20000, 20000, 1024)
+    expected = np.sqrt(np.mean(samples.astype(float) ** 2))
+    assert _chunk_rms(samples.astype("<i2").tobytes(), 2) == pytest.approx(expected)
+    assert _chunk_rms(samples.astype("<i4").tobytes(), 4) == pytest.approx(expected)
+    packed = np.stack([(samples >> shift) & 0xFF for shift in (0, 8, 16)], axis=1).astype("u1").tobytes()
+    assert _chunk_rms(packed, 3) == pytest.approx(expected)
+    assert _chunk_rms(b"", 2) == 0.0
+
+def test_8_bit_wav_audio_is_read_as_signed_samples(tmp_path):
+    signed = np.array([0, 100, -100, 127, -128, 0], dtype="i1")
+    path = tmp_path / "speech.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(8000)
+        wav.writeframes((signed.astype(np.int16) + 128).astype("u1").tobytes())
+    source = WavFileSource(str(path))
+    source.open()
+    try:
+        chunk = source.read(1024)
+    finally:
+        source.close()
+    assert chunk == signed.tobytes()
+    expected = np.sqrt(np.mean(signed.astype(float) ** 2))
+    assert _chunk_rms(chunk, 1) == pytest.approx(expected)
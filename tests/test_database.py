@@ -0,0 +1,122 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from core.config import DatabaseSettings
+from core.database import DatabaseManager
+from core.exceptions import DatabaseError
+
+def _run(tmp_path, body, **settings):
+    async def run():
+        db = DatabaseManager(str(tmp_path / "jarvis.db"), DatabaseSettings(**settings))
+        try:
+            return await body(db)
+        finally:
+            await db.close()
+    return asyncio.run(run())
+
+def test_content_matches_outrank_tag_matches(tmp_path):
+    async def body(db):
+        await db.store_memory("bought new running shoes", "shopping", ["garden"])
+        await db.store_memory("planted tomatoes in the garden", "note", [])
+        return [row["content"] for row in await db.recall_memories("garden")]
+
+    assert _run(tmp_path, body) == ["planted tomatoes in the garden", "bought new running shoes"]
+
+def test_pages_cover_every_match_once_in_rank_order(tmp_path):
+    async def body(db):
+        for i in range(7):
+            await db.store_memory(f"meeting note {i} " + "meeting " * i, "note", [])
+        everything = [row["id"] for row in await db.recall_memories("meeting", limit=100)]
+        pages = [[row["id"] for row in await db.recall_memories("meeting", limit=3, offset=offset)]
+                 for offset in (0, 3, 6, 9)]
+        return everything, pages
+
+    everything, pages = _run(tmp_path, body)
+    assert len(everything) == 7
+    assert [len(page) for page in pages] == [3, 3, 1, 0]
+    assert sum(pages, []) == everything
+
+def test_snippets_mark_the_matched_terms(tmp_path):
+    async def body(db):
+        await db.store_memory("the spare key is under the blue flower pot by the door", "note", [])
+        with_snippets = await db.recall_memories("ke flower", with_snippets=True)
+        without = await db.recall_memories("ke flower")
+        return with_snippets[0]["snippet"], without[0].keys()
+
+    snippet, columns = _run(tmp_path, body)
+    # Terms match as prefixes, so "ke" finds "key".
+    assert "[key]" in snippet and "[flower]" in snippet
+    assert "snippet" not in columns
+
+def test_query_syntax_in_user_text_is_treated_as_words(tmp_path):
+    async def body(db):
+        await db.store_memory("wifi password is on the fridge", "note", [])
+        return (
+            [row["content"] for row in await db.recall_memories('wifi AND "password* NOT (')],
+            await db.recall_memories("?!"),
+        )
+
+    found, nothing = _run(tmp_path, body)
+    assert found == ["wifi password is on the fridge"]
+    assert nothing == []
+
+def test_recall_sees_memories_still_queued_or_being_flushed(tmp_path):
+    async def body(db):
+        await db.store_memory("the spare key is under the blue pot", "note", [])
+        queued = [row["content"] for row in await db.recall_memories("spare key")]
+        store = db._store_memories_blocking
+        db._store_memories_blocking = lambda rows: (time.sleep(0.2), store(rows))
+        await db.store_memory("parked the car on level three", "note", [])
+        flushing = asyncio.create_task(db.flush())
+        await asyncio.sleep(0)
+        # The flush has taken the batch off the queue but not yet written it.
+        assert not db._pending_memories and db._flush_lock.locked()
+        in_flight = [row["content"] for row in await db.recall_memories("parked car")]
+        await flushing
+        return queued, in_flight
+
+    queued, in_flight = _run(tmp_path, body, write_flush_interval=60)
+    assert queued == ["the spare key is under the blue pot"]
+    assert in_flight == ["parked the car on level three"]
+
+def test_a_failed_flush_keeps_its_rows_queued_in_order(tmp_path):
+    async def body(db):
+        store = db._store_memories_blocking
+        calls = []
+
+        def failing_once(rows):
+            calls.append(len(rows))
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            store(rows)
+
+        db._store_memories_blocking = failing_once
+        await db.store_memory("first", "note", [])
+        await db.store_memory("second", "note", [])
+        with pytest.raises(DatabaseError):
+            await db.flush()
+        await db.store_memory("third", "note", [])
+        await db.flush()
+        rows = db.conn.execute("SELECT content FROM memories ORDER BY id").fetchall()
+        return calls, [row["content"] for row in rows]
+
+    calls, contents = _run(tmp_path, body, write_flush_interval=60)
+    assert calls == [2, 3]
+    assert contents == ["first", "second", "third"]
+
+def test_queued_memories_are_written_after_the_flush_interval(tmp_path):
+    async def body(db):
+        await db.store_memory("water the plants", "note", [])
+        other = sqlite3.connect(tmp_path / "jarvis.db")
+        try:
+            before = other.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+            await asyncio.sleep(0.3)
+            after = other.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+        finally:
+            other.close()
+        return before, after
+
+    assert _run(tmp_path, body, write_flush_interval=0.05) == (0, 1)
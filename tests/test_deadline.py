@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from core.exceptions import DeadlineExceededError
+from utils.deadline import deadline_paused, deadline_scope, within_deadline
+
+def test_stage_past_the_deadline_is_cancelled():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with deadline_scope(0.05):
+            await within_deadline(slow(), "slow")
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run())
+    assert cancelled == [True]
+
+def test_paused_time_is_not_counted():
+    async def speaks_then_answers():
+        with deadline_paused():
+            await asyncio.sleep(0.2)
+        await asyncio.sleep(0.02)
+        return "answered"
+
+    async def run():
+        with deadline_scope(0.1):
+            return await within_deadline(speaks_then_answers(), "answer")
+
+    assert asyncio.run(run()) == "answered"
+
+def test_a_stage_timeout_of_its_own_is_not_a_deadline_error():
+    async def times_out():
+        raise asyncio.TimeoutError()
+
+    async def run():
+        with deadline_scope(1.0):
+            await within_deadline(times_out(), "stage")
+
+    with pytest.raises(asyncio.TimeoutError) as error:
+        asyncio.run(run())
+    assert not isinstance(error.value, DeadlineExceededError)
+
+def test_a_spent_budget_fails_before_the_stage_starts():
+    started = []
+
+    async def stage():
+        started.append(True)
+
+    async def run():
+        with deadline_scope(0.0):
+            await within_deadline(stage(), "stage")
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run())
+    assert started == []
+
+def test_without_a_deadline_the_stage_runs_unbounded():
+    async def stage():
+        await asyncio.sleep(0.01)
+        return 42
+
+    assert asyncio.run(within_deadline(stage(), "stage")) == 42
+
+def test_cancelling_the_caller_cancels_the_stage():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with deadline_scope(10):
+            caller = asyncio.create_task(within_deadline(slow(), "slow"))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            return caller.cancelled()
+
+    assert asyncio.run(run())
+    assert cancelled == [True]
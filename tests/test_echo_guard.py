@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from benchmarks.command_latency import StandInSpeechRecognizer
+from core.config import JarvisConfig, VoiceSettings
+from core.jarvis import AdvancedJARVIS
+from services.intent_parser import IntentParser
+from services.tts_engine import MIXER_SAMPLE_RATE, TTSEngine
+from utils.health_monitor import HealthMonitor
+from utils.http_client import HttpClient
+from utils.system_sampler import SystemSampler
+
+lameenc = pytest.importorskip("lameenc")
+
+def _tone_mp3(seconds: float) -> bytes:
+    t = np.arange(int(seconds * MIXER_SAMPLE_RATE)) / MIXER_SAMPLE_RATE
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(48)
+    encoder.set_in_sample_rate(MIXER_SAMPLE_RATE)
+    encoder.set_channels(1)
+    return bytes(encoder.encode((4000 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()) + encoder.flush())
+
+def _jarvis(tmp_path, tts: TTSEngine) -> AdvancedJARVIS:
+    config = JarvisConfig(api_keys={"openweather": "key", "news": "key"}, database_path=str(tmp_path / "jarvis.db"))
+    jarvis = AdvancedJARVIS(
+        config, None, tts, StandInSpeechRecognizer([]), IntentParser(),
+        HealthMonitor(SystemSampler(1, 5)), HttpClient(config.http_settings),
+    )
+    jarvis.is_active = True
+    return jarvis
+
+def test_transcript_of_speech_heard_during_playback_is_dropped_after_it_ends(tmp_path):
+    async def run():
+        tts = TTSEngine(VoiceSettings(audio_cache_enabled=False, streaming=False))
+        jarvis = _jarvis(tmp_path, tts)
+        try:
+            played = time.time()
+            await tts._play_audio(_tone_mp3(0.3))
+            stopped = time.time()
+            # The echo's transcript only arrives now, when nothing is playing any more.
+            assert not tts.is_speaking
+            echo = (played + 0.1, stopped + 0.2)
+            await jarvis._accept_command("what time is it", {}, None, echo)
+            dropped = jarvis._current_command is None
+
+            await jarvis._accept_command("jarvis what time is it", {}, None, echo)
+            addressed = jarvis._current_command is not None
+            jarvis._current_command.cancel()
+            await asyncio.gather(jarvis._current_command, return_exceptions=True)
+            jarvis._current_command = None
+
+            later = (stopped + 2.0, stopped + 3.0)
+            await jarvis._accept_command("what time is it", {}, None, later)
+            accepted = jarvis._current_command is not None
+            jarvis._current_command.cancel()
+            await asyncio.gather(jarvis._current_command, return_exceptions=True)
+            return dropped, addressed, accepted, jarvis.metrics.counters["commands.ignored"]
+        finally:
+            await tts.close()
+
+    dropped, addressed, accepted, ignored = asyncio.run(run())
+    assert dropped and addressed and accepted
+    assert ignored == 1
+
+def test_playback_interval_is_recorded(tmp_path):
+    async def run():
+        tts = TTSEngine(VoiceSettings(audio_cache_enabled=False, streaming=False))
+        try:
+            before = time.time()
+            assert not tts.played_during(before - 10, before)
+            await tts._play_audio(_tone_mp3(0.2))
+            after = time.time()
+            return (
+                tts.played_during(before, after),
+                tts.played_during(after + 0.1, after + 1.0, tail=0.5),
+                tts.played_during(after + 1.0, after + 2.0, tail=0.5),
+            )
+        finally:
+            await tts.close()
+
+    assert asyncio.run(run()) == (True, True, False)
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from utils.histogram import LogHistogram, WindowedHistogram
+from utils.metrics_collector import MetricsCollector
+
+def _exact_percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(1, -(-pct * len(ordered) // 100)) - 1]
+
+def test_percentiles_stay_within_the_bucket_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-3, 1) for _ in range(20000)]
+    histogram = LogHistogram()
+    for value in values:
+        histogram.record(value)
+    for pct in (50, 90, 99):
+        exact = _exact_percentile(values, pct)
+        assert histogram.percentile(pct) == pytest.approx(exact, rel=histogram.growth - 1)
+    assert histogram.max == max(values)
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+
+def test_percentiles_never_leave_the_observed_range():
+    histogram = LogHistogram()
+    histogram.record(0.123)
+    assert histogram.percentile(1) == histogram.percentile(99) == 0.123
+
+def test_merge_matches_recording_everything_in_one():
+    a, b, both = LogHistogram(), LogHistogram(), LogHistogram()
+    for i in range(1, 1000):
+        (a if i % 2 else b).record(i / 1000)
+        both.record(i / 1000)
+    merged = a.copy().merge(b)
+    assert merged.summary() == pytest.approx(both.summary())
+    # copy() is independent of the original.
+    assert a.count == 500
+
+def test_merge_rejects_a_different_layout():
+    with pytest.raises(ValueError):
+        LogHistogram(growth=1.05).merge(LogHistogram(growth=1.1))
+
+def test_windows_forget_old_values():
+    histogram = WindowedHistogram()
+    histogram.record(5.0, now=0.0)
+    histogram.record(0.5, now=120.0)
+    assert histogram.snapshot("1m", now=120.0).max == 0.5
+    assert histogram.snapshot("1h", now=120.0).count == 2
+    assert histogram.snapshot("1h", now=4000.0).count == 0
+    assert histogram.snapshot().count == 2
+
+def test_timer_summary_of_an_unknown_timer_adds_nothing():
+    metrics = MetricsCollector()
+    assert metrics.timer_summary("commands.duration.unknown")["count"] == 0
+    assert metrics.snapshot()["timers"] == {}
@@ -0,0 +1,66 @@
+import asyncio
+import random
+import re
+
+import pytest
+
+from services.intent_parser import LOCATION_PATTERN, IntentParser
+
+def _reference_parse(parser: IntentParser, command: str) -> tuple:
+    """The original rules: each pattern searched in priority order, first hit wins."""
+    for intent, pattern in parser.patterns.items():
+        match = re.search(pattern, command, re.IGNORECASE)
+        if match:
+            entities = {}
+            if len(match.groups()) > 1:
+                entities['query'] = match.group(2).strip()
+            location_match = re.search(LOCATION_PATTERN, command)
+            if location_match:
+                entities['location'] = location_match.group(2).strip()
+            return intent, entities
+    return "conversation", {"original_command": command}
+
+WORDS = [
+    "search for", "google", "find", "look up", "tell me about", "play", "put on", "remember that",
+    "remember", "save", "note", "what did i say about", "recall", "do you remember", "time", "clock",
+    "date", "day", "weather", "forecast", "news", "headlines", "system status", "diagnostics", "joke",
+    "funny", "sleep", "goodbye", "shut down", "how are you", "status report", "in", "for", "In", "FOR",
+    "London", "new york", "the", "music", "tomorrow", "Weather", "PLAY", "playing", "daytime", "x",
+]
+
+@pytest.mark.parametrize("command", [
+    "what's the weather in London", "play some jazz for me", "remember that the key is under the pot",
+    "what did i say about the car", "tell me a joke", "search for pizza in new york", "hello there",
+    "WEATHER FOR Paris", "", "forecast for   Rome  ",
+])
+def test_known_commands_match_the_original_rules(command):
+    parser = IntentParser()
+    assert parser.classify(command) == _reference_parse(parser, command)
+
+def test_random_commands_match_the_original_rules():
+    parser = IntentParser()
+    rng = random.Random(5)
+    for _ in range(5000):
+        command = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+        assert parser.classify(command) == _reference_parse(parser, command), command
+
+def test_parse_and_parse_many_agree_with_classify():
+    parser = IntentParser()
+    commands = ["what time is it", "play the news", "goodbye"]
+
+    async def run():
+        return [await parser.parse(command) for command in commands], await parser.parse_many(commands)
+
+    single, batch = asyncio.run(run())
+    assert single == batch == [parser.classify(command) for command in commands]
+
+def test_incremental_reading_settles_after_it_stops_changing():
+    incremental = IntentParser().incremental(settle_time=0.3)
+    assert incremental.feed("what's the", now=0.0)
+    assert incremental.settled(now=1.0) is None  # Still just conversation.
+    assert incremental.feed("what's the weather", now=1.0)
+    assert not incremental.feed("what's the weather", now=1.1)
+    assert incremental.settled(now=1.2) is None
+    assert incremental.settled(now=1.3) == ("weather_query", {})
+    assert incremental.feed("what's the weather in paris", now=1.4)
+    assert incremental.settled(now=1.8) == ("weather_query", {"location": "paris"})
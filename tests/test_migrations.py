@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+
+from core.migrations import SCHEMA_VERSION, migrate, schema_version
+
+def _legacy_db(rows: int) -> sqlite3.Connection:
+    """An in-memory store in the shape the root-level database.py created."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE memories (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT NOT NULL, timestamp TEXT)")
+    conn.execute("CREATE TABLE user_preferences (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.executemany(
+        "INSERT INTO memories (content, timestamp) VALUES (?, ?)",
+        [(f"memory {i}", f"2024-01-01T00:00:{i % 60:02d}") for i in range(rows)],
+    )
+    conn.commit()
+    return conn
+
+def _tables(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+class _Crash(Exception):
+    pass
+
+def _crash_after_first_batch(step, done, total):
+    raise _Crash()
+
+def test_migrates_legacy_rows_keeping_ids_and_timestamps():
+    conn = _legacy_db(100)
+    assert migrate(conn, batch_size=30) == SCHEMA_VERSION
+    rows = conn.execute("SELECT id, content, created_at, tags FROM memories ORDER BY id").fetchall()
+    assert len(rows) == 100
+    assert rows[0] == (1, "memory 0", "2024-01-01T00:00:00", "[]")
+    assert "memories_legacy" not in _tables(conn)
+
+def test_interrupted_legacy_copy_resumes_on_next_start():
+    conn = _legacy_db(100)
+    with pytest.raises(_Crash):
+        migrate(conn, batch_size=30, progress=_crash_after_first_batch)
+    assert conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 30
+    assert schema_version(conn) == 0
+
+    assert migrate(conn, batch_size=30) == SCHEMA_VERSION
+    ids = [row[0] for row in conn.execute("SELECT id FROM memories ORDER BY id")]
+    assert ids == list(range(1, 101))
+    assert "memories_legacy" not in _tables(conn)
+    # The full-text index covers the rows copied on either run.
+    assert conn.execute("SELECT COUNT(*) FROM memories_fts WHERE memories_fts MATCH 'memory'").fetchone()[0] == 100
+
+def test_leftover_legacy_table_is_copied_even_if_version_was_bumped():
+    conn = _legacy_db(100)
+    with pytest.raises(_Crash):
+        migrate(conn, batch_size=30, progress=_crash_after_first_batch)
+    # What an earlier release recorded after resuming into the half-filled table.
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+    migrate(conn, batch_size=30)
+    assert conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 100
+    assert "memories_legacy" not in _tables(conn)
+
+def test_fresh_database_gets_the_current_schema():
+    conn = sqlite3.connect(":memory:")
+    assert migrate(conn) == SCHEMA_VERSION
+    assert {"memories", "user_preferences", "memories_fts"} <= _tables(conn)
+    # Migrating again is a no-op.
+    assert migrate(conn) == SCHEMA_VERSION
+
+def test_newer_schema_is_refused():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    with pytest.raises(sqlite3.DatabaseError):
+        migrate(conn)
+
+def test_text_edits_and_deletes_are_logged_for_the_vector_index():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    assert "memory_vector_changes" in _tables(conn)
+    conn.executemany("INSERT INTO memories (content) VALUES (?)", [("a",), ("b",), ("c",)])
+    conn.execute("UPDATE memories SET category = 'note' WHERE id = 1")
+    conn.execute("UPDATE memories SET content = 'bb' WHERE id = 2")
+    conn.execute("DELETE FROM memories WHERE id = 3")
+    assert [row[0] for row in conn.execute("SELECT id FROM memory_vector_changes ORDER BY id")] == [2, 3]
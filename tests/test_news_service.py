@@ -0,0 +1,69 @@
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+
+from benchmarks.command_latency import StandInSpeechRecognizer, StandInTTSEngine
+from core.config import HttpSettings, JarvisConfig
+from core.exceptions import ServiceUnavailableError
+from core.jarvis import AdvancedJARVIS
+from services.intent_parser import IntentParser
+from services.news_service import NewsService
+from utils.health_monitor import HealthMonitor
+from utils.http_client import HttpClient
+from utils.rate_limiter import RateLimiter
+from utils.system_sampler import SystemSampler
+
+async def _headlines_from(body: str):
+    """Fetches headlines from a local server that answers with body."""
+    async def headlines(request):
+        return web.Response(text=body, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_get("/v2/top-headlines", headlines)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    await web.SockSite(runner, sock).start()
+    http_client = HttpClient(HttpSettings())
+    await http_client.start()
+    try:
+        service = NewsService("key", http_client, RateLimiter(10, 60), max_wait=0)
+        service.base_url = f"http://127.0.0.1:{port}/v2/top-headlines"
+        return await service.get_top_headlines()
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+def test_articles_are_returned():
+    body = '{"articles": [{"title": "Rain"}, "junk", {"title": "Sun"}]}'
+    assert asyncio.run(_headlines_from(body)) == [{"title": "Rain"}, {"title": "Sun"}]
+
+@pytest.mark.parametrize("body", ['["not", "a", "dict"]', '{"articles": "none"}', "{not json", "null"])
+def test_unexpected_payloads_are_service_errors(body):
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(_headlines_from(body))
+
+def test_prefetch_keeps_going_after_an_unexpected_error(tmp_path):
+    config = JarvisConfig(api_keys={"openweather": "key", "news": "key"}, database_path=str(tmp_path / "jarvis.db"))
+    config.behavior.news_refresh_interval = 0
+    jarvis = AdvancedJARVIS(
+        config, None, StandInTTSEngine(), StandInSpeechRecognizer([]), IntentParser(),
+        HealthMonitor(SystemSampler(1, 5)), HttpClient(config.http_settings),
+    )
+    calls = []
+
+    async def get_top_headlines():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise AttributeError("'list' object has no attribute 'get'")
+        jarvis.is_running = False
+        return [{"title": "Rain"}]
+
+    jarvis.news_service.get_top_headlines = get_top_headlines
+    asyncio.run(asyncio.wait_for(jarvis._news_prefetch_loop(), timeout=5))
+    assert len(calls) == 2
+    assert jarvis.headlines.value == [{"title": "Rain"}]
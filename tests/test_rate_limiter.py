@@ -0,0 +1,63 @@
+import asyncio
+
+import utils.rate_limiter as rate_limiter
+from utils.rate_limiter import RateLimiter
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+def _limiter(monkeypatch, *args, **kwargs):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return RateLimiter(*args, **kwargs), clock
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(monkeypatch):
+    limiter, clock = _limiter(monkeypatch, 10, 60.0)
+
+    async def take(n):
+        return [await limiter.allow_request() for _ in range(n)]
+
+    assert asyncio.run(take(11)) == [True] * 10 + [False]
+    clock.now += 6.0  # One token at 10 per minute.
+    assert asyncio.run(take(2)) == [True, False]
+    clock.now += 3600.0
+    assert limiter.available() == 10
+
+def test_keys_have_independent_buckets_and_limits(monkeypatch):
+    limiter, _ = _limiter(monkeypatch, 1, 1.0)
+    limiter.set_limit("news", 100, 86400)
+
+    async def run():
+        return (await limiter.allow_request("weather"), await limiter.allow_request("weather"),
+                await limiter.allow_request("news"))
+
+    assert asyncio.run(run()) == (True, False, True)
+    assert limiter.available("news") == 99
+
+def test_acquire_gives_up_rather_than_wait_too_long(monkeypatch):
+    limiter, _ = _limiter(monkeypatch, 1, 60.0)
+
+    async def run():
+        return await limiter.acquire(), await limiter.acquire(max_wait=1.0)
+
+    assert asyncio.run(run()) == (True, False)
+    # The refused call took nothing.
+    assert limiter.available() == 0
+
+def test_cancelled_acquire_returns_its_token():
+    limiter = RateLimiter(1, 0.2)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter.available()
+
+    # Without the refund the bucket would still owe the cancelled reservation.
+    assert 0 <= asyncio.run(run()) < 1
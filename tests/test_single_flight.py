@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch(city):
+        calls.append(city)
+        await asyncio.sleep(0.01)
+        return f"sunny in {city}"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("paris", fetch, "paris") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["sunny in paris"] * 5
+    assert calls == ["paris"]
+    assert (flight.calls, flight.coalesced) == (1, 4)
+    assert not flight.in_flight("paris")
+
+def test_every_waiter_gets_the_same_exception():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("upstream down")
+
+    async def run():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+    assert results[0] is results[1]
+
+def test_a_cancelled_waiter_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", slow))
+        second = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 42
+
+def test_calls_after_completion_start_afresh():
+    flight = SingleFlight()
+
+    async def value():
+        return object()
+
+    async def run():
+        return await flight.do("k", value), await flight.do("k", value)
+
+    first, second = asyncio.run(run())
+    assert first is not second
+    assert flight.calls == 2
@@ -0,0 +1,95 @@
+import asyncio
+
+from benchmarks.command_latency import StandInSpeechRecognizer, StandInTTSEngine
+from core.config import JarvisConfig
+from core.jarvis import AdvancedJARVIS
+from services.intent_parser import IntentParser
+from utils.health_monitor import HealthMonitor
+from utils.http_client import HttpClient
+from utils.system_sampler import SystemSampler
+
+SETTLE_TIME = 0.05
+
+def _jarvis(tmp_path) -> AdvancedJARVIS:
+    config = JarvisConfig(api_keys={"openweather": "key", "news": "key"}, database_path=str(tmp_path / "jarvis.db"))
+    config.behavior.speculation_settle_time = SETTLE_TIME
+    jarvis = AdvancedJARVIS(
+        config, None, StandInTTSEngine(), StandInSpeechRecognizer([]), IntentParser(),
+        HealthMonitor(SystemSampler(1, 5)), HttpClient(config.http_settings),
+    )
+    jarvis.is_active = True
+    return jarvis
+
+async def _hear(jarvis: AdvancedJARVIS, partial: str, final: str):
+    """Feeds a partial transcript, lets it settle, then runs the final command to completion."""
+    jarvis._on_partial_transcript(partial)
+    await asyncio.sleep(SETTLE_TIME * 3)
+    speculation = jarvis._take_speculation()
+    await jarvis._accept_command(final, {}, speculation)
+    await jarvis._current_command
+    return speculation
+
+def test_confirmed_speculation_speaks_the_prepared_response(tmp_path):
+    async def run():
+        jarvis = _jarvis(tmp_path)
+        speculation = await _hear(jarvis, "What time", "what time is it")
+        return speculation, jarvis
+
+    speculation, jarvis = asyncio.run(run())
+    assert speculation is not None and speculation.intent == "time_query"
+    assert jarvis.metrics.counters["speculation.confirmed"] == 1
+    assert jarvis.metrics.counters["speculation.cancelled"] == 0
+    assert len(jarvis.tts_engine.spoken) == 1
+
+def test_speculation_the_final_transcript_contradicts_is_cancelled(tmp_path):
+    async def run():
+        jarvis = _jarvis(tmp_path)
+        speculation = await _hear(jarvis, "what time", "tell me a joke")
+        return speculation, jarvis
+
+    speculation, jarvis = asyncio.run(run())
+    assert jarvis.metrics.counters["speculation.cancelled"] == 1
+    assert jarvis.metrics.counters["speculation.confirmed"] == 0
+    # Only the joke was told, not the time prepared for the partial transcript.
+    assert len(jarvis.tts_engine.spoken) == 1
+    assert jarvis.tts_engine.spoken[0] != speculation.task.result()
+
+def test_uncached_weather_falls_back_to_the_handler(tmp_path):
+    fetched = []
+
+    async def get_weather(location):
+        fetched.append(location)
+        return {"location": location, "temperature": 12, "description": "light rain"}
+
+    async def run():
+        jarvis = _jarvis(tmp_path)
+        jarvis.weather_service.get_weather = get_weather
+        # Nothing is cached, so speculating must not call the API.
+        jarvis._on_partial_transcript("what's the weather in paris")
+        await asyncio.sleep(SETTLE_TIME * 3)
+        fetched_while_speculating = list(fetched)
+        speculation = jarvis._take_speculation()
+        await jarvis._accept_command("what's the weather in paris", {}, speculation)
+        await jarvis._current_command
+        return fetched_while_speculating, speculation, jarvis
+
+    fetched_while_speculating, speculation, jarvis = asyncio.run(run())
+    assert fetched_while_speculating == []
+    assert speculation is not None and speculation.task.result() is None
+    assert fetched == ["paris"]
+    assert jarvis.metrics.counters["speculation.confirmed"] == 0
+    assert any("12" in text for text, _ in jarvis.tts_engine.spoken)
+
+def test_a_dropped_utterance_cancels_its_speculation(tmp_path):
+    async def run():
+        jarvis = _jarvis(tmp_path)
+        jarvis._on_partial_transcript("what time")
+        await asyncio.sleep(SETTLE_TIME * 3)
+        speculation = jarvis._speculation
+        jarvis._on_partial_transcript(None)
+        await asyncio.sleep(0)
+        return speculation, jarvis
+
+    speculation, jarvis = asyncio.run(run())
+    assert speculation is not None and jarvis._speculation is None
+    assert jarvis.metrics.counters["speculation.cancelled"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+import wave
+
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from core.config import SpeechSettings
+from services.recognizer_backends import GoogleBackend, StubBackend
+from services.speech_recognizer import SpeechRecognizer
+
+SAMPLE_RATE = 16000
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE))
+
+def _voiced(seconds: float) -> np.ndarray:
+    """A vowel-like tone: a 150 Hz fundamental and a few harmonics."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return sum(3000 / k * np.sin(2 * np.pi * 150 * k * t) for k in range(1, 5))
+
+def _hiss(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0, 3000, int(seconds * SAMPLE_RATE))
+
+def _write_wav(path, *parts):
+    samples = np.concatenate(parts).astype("<i2")
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+async def _transcripts(recognizer: SpeechRecognizer) -> list:
+    await recognizer.initialize()
+    try:
+        heard = []
+        while True:
+            text = await recognizer.listen()
+            if text is None:
+                return heard
+            heard.append(text)
+    finally:
+        await recognizer.close()
+
+@pytest.mark.parametrize("partial_results", [False, True])
+def test_capture_vad_and_recognition_run_as_a_pipeline(tmp_path, partial_results):
+    path = tmp_path / "speech.wav"
+    _write_wav(path, _silence(0.5), _voiced(1.0), _silence(1.2), _hiss(0.6), _silence(1.2),
+               _voiced(0.8), _silence(1.2))
+    settings = SpeechSettings(
+        energy_threshold=300, timeout=1.0, calibration_seconds=0, adaptive_noise=False, vad_enabled=True,
+        backend="stub", stub_transcripts_file=None, pipeline=True, partial_results=partial_results,
+        audio_file=str(path), audio_file_realtime=False,
+    )
+    recognizer = SpeechRecognizer(settings)
+    recognizer.backend = StubBackend(["Turn on the lights", "What time is it"])
+
+    assert asyncio.run(_transcripts(recognizer)) == ["turn on the lights", "what time is it"]
+    # The hiss was loud enough to endpoint but was stopped before the recognizer.
+    assert recognizer.vad_stats()["accepted"] == 2
+    assert recognizer.vad_stats()["rejected.noise"] == 1
+
+def test_recognition_worker_survives_a_failing_backend(tmp_path):
+    path = tmp_path / "speech.wav"
+    _write_wav(path, _silence(0.5), _voiced(1.0), _silence(1.2), _voiced(1.0), _silence(1.2))
+    settings = SpeechSettings(
+        energy_threshold=300, timeout=1.0, calibration_seconds=0, adaptive_noise=False, vad_enabled=True,
+        backend="stub", stub_transcripts_file=None, pipeline=True, partial_results=False,
+        audio_file=str(path), audio_file_realtime=False,
+    )
+    recognizer = SpeechRecognizer(settings)
+    backend = StubBackend(["hello", "goodbye"])
+    calls = []
+
+    def flaky_recognize(audio):
+        calls.append(audio)
+        if len(calls) == 1:
+            raise RuntimeError("backend fell over")
+        return StubBackend.recognize(backend, audio)
+
+    backend.recognize = flaky_recognize
+    recognizer.backend = backend
+
+    assert asyncio.run(_transcripts(recognizer)) == ["hello"]
+    assert len(calls) == 2
+
+def test_whole_utterance_backends_refuse_to_stream():
+    backend = GoogleBackend(sr.Recognizer())
+    assert not backend.streaming
+    with pytest.raises(NotImplementedError):
+        backend.start_stream(SAMPLE_RATE)
@@ -0,0 +1,51 @@
+import utils.ttl_cache as ttl_cache
+from utils.ttl_cache import TTLCache
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+def test_entries_go_stale_but_stay_available(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ttl_cache, "time", clock)
+    cache = TTLCache(ttl=60)
+    cache.set("london", {"temperature": 12})
+    clock.now += 30
+    entry = cache.get("london")
+    assert cache.is_fresh(entry) and entry.age == 30
+    clock.now += 3600
+    entry = cache.get("london")
+    assert not cache.is_fresh(entry)
+    assert entry.value == {"temperature": 12}
+
+def test_setting_again_refreshes_the_entry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ttl_cache, "time", clock)
+    cache = TTLCache(ttl=60)
+    cache.set("london", 1)
+    clock.now += 120
+    cache.set("london", 2)
+    entry = cache.get("london")
+    assert cache.is_fresh(entry) and entry.value == 2
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a").value == 1 and cache.get("c").value == 3
+
+def test_missing_key_is_none():
+    assert TTLCache(ttl=60).get("nowhere") is None
+
+def test_clear_drops_every_entry():
+    cache = TTLCache(ttl=60)
+    cache.set("london", 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.get("london") is None
@@ -0,0 +1,61 @@
+import asyncio
+import sqlite3
+
+from core.config import DatabaseSettings
+from core.database import DatabaseManager
+from core.vector_index import VectorIndex
+
+def test_removed_ids_are_never_returned(tmp_path):
+    index = VectorIndex(tmp_path / "vectors")
+    index.add([1, 2], ["spare key under the blue pot", "spare key in the kitchen drawer"])
+    index.remove([1])
+    assert [hit[0] for hit in index.search("spare key")] == [2]
+
+def test_update_replaces_the_vector(tmp_path):
+    index = VectorIndex(tmp_path / "vectors")
+    index.add([1], ["dentist appointment on friday"])
+    index.update([1], ["parked the car on level three"])
+    hits = index.search("car parked", min_score=0.1)
+    assert [hit[0] for hit in hits] == [1]
+    assert index.search("dentist appointment", min_score=0.5) == []
+
+def test_index_grows_and_survives_a_reopen(tmp_path):
+    index = VectorIndex(tmp_path / "vectors", initial_capacity=2)
+    texts = [f"memory number {i} about topic{i}" for i in range(1, 6)]
+    index.add([1, 2, 3, 4, 5], texts)
+    assert index.capacity >= 5
+    reopened = VectorIndex(tmp_path / "vectors", initial_capacity=2)
+    assert (reopened.count, reopened.max_id) == (5, 5)
+    assert reopened.search("topic3", k=1)[0][0] == 3
+
+def test_index_follows_edits_deletes_and_reused_ids(tmp_path):
+    async def run():
+        settings = DatabaseSettings(semantic_recall=True, semantic_min_score=0.1)
+        db = DatabaseManager(str(tmp_path / "jarvis.db"), settings)
+        for content in ("the spare key is under the blue pot", "parked the car on level three"):
+            await db.store_memory(content, "note", [])
+        await db.flush()
+
+        # Changes made behind the manager's back, as a manual fix-up would be.
+        other = sqlite3.connect(tmp_path / "jarvis.db")
+        other.execute("UPDATE memories SET content = 'the bicycle is behind the shed' WHERE id = 1")
+        other.execute("DELETE FROM memories WHERE id = 2")
+        other.commit()
+        other.close()
+        bicycle = [row["id"] for row in await db.recall_memories("bicycle shed", semantic=True)]
+        key = [row["id"] for row in await db.recall_memories("spare key blue pot", semantic=True)]
+
+        # Without AUTOINCREMENT the next row takes the deleted id 2.
+        await db.store_memory("the wifi password is on the fridge", "note", [])
+        await db.flush()
+        # A stale vector for id 2 would bring the wifi memory up for the old car text.
+        car = [row["id"] for row in await db.recall_memories("parked car level", semantic=True)]
+        wifi = [(row["id"], row["content"]) for row in await db.recall_memories("wifi password", semantic=True)]
+        await db.close()
+        return bicycle, key, car, wifi
+
+    bicycle, key, car, wifi = asyncio.run(run())
+    assert bicycle == [1]
+    assert key == []
+    assert car == []
+    assert wifi == [(2, "the wifi password is on the fridge")]
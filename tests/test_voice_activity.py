@@ -0,0 +1,67 @@
+import numpy as np
+
+from services.audio_capture import _chunk_rms
+from services.voice_activity import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+def _seconds(seconds: float) -> np.ndarray:
+    return np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+
+def _voiced(seconds: float = 1.0) -> np.ndarray:
+    t = _seconds(seconds)
+    return sum(3000 / k * np.sin(2 * np.pi * 150 * k * t) for k in range(1, 5))
+
+def _pcm(samples: np.ndarray, dtype: str = "<i2") -> memoryview:
+    return memoryview(samples.astype(dtype).tobytes())
+
+def _pcm24(samples: np.ndarray) -> memoryview:
+    ints = samples.astype("<i4")
+    return memoryview(np.stack([(ints >> shift) & 0xFF for shift in (0, 8, 16)], axis=1).astype("u1").tobytes())
+
+def test_voiced_audio_is_speech():
+    verdict = VoiceActivityDetector().analyze([_pcm(_voiced())], SAMPLE_RATE, 2, 300)
+    assert verdict.is_speech and verdict.reason == "speech"
+
+def test_hiss_and_hum_are_noise_and_silence_is_quiet():
+    vad = VoiceActivityDetector()
+    hiss = np.random.default_rng(0).normal(0, 3000, SAMPLE_RATE)
+    hum = 4000 * np.sin(2 * np.pi * 50 * _seconds(1.0))
+    assert vad.analyze([_pcm(hiss)], SAMPLE_RATE, 2, 300).reason == "noise"
+    assert vad.analyze([_pcm(hum)], SAMPLE_RATE, 2, 300).reason == "noise"
+    assert vad.analyze([_pcm(np.zeros(SAMPLE_RATE))], SAMPLE_RATE, 2, 300).reason == "quiet"
+
+def test_a_wrapped_utterance_scores_like_a_contiguous_one():
+    vad = VoiceActivityDetector()
+    pcm = _pcm(_voiced())
+    whole = vad.analyze([pcm], SAMPLE_RATE, 2, 300)
+    split = vad.analyze([pcm[:10001 * 2], pcm[10001 * 2:]], SAMPLE_RATE, 2, 300)
+    assert whole == split
+
+def test_8_and_24_bit_audio_are_read():
+    vad = VoiceActivityDetector()
+    # 8-bit audio is signed by the time it is captured, as it is in AudioData.
+    assert vad.analyze([_pcm(_voiced() / 256, "i1")], SAMPLE_RATE, 1, 300 / 256).is_speech
+    assert vad.analyze([_pcm(np.zeros(SAMPLE_RATE), "i1")], SAMPLE_RATE, 1, 300 / 256).reason == "quiet"
+    # A sample split across the wrap point must still be reassembled.
+    pcm24 = _pcm24(_voiced() * 256)
+    assert vad.analyze([pcm24[:1001], pcm24[1001:]], SAMPLE_RATE, 3, 300 * 256).is_speech
+
+def test_frame_levels_are_on_the_capture_scale():
+    # A steady tone just above the capture threshold must be loud to the gate as well.
+    vad = VoiceActivityDetector()
+    for width, dtype, scale in ((1, "i1", 1 / 256), (2, "<i2", 1), (4, "<i4", 65536)):
+        pcm = _pcm(_voiced() * scale, dtype)
+        level = _chunk_rms(bytes(pcm), width)
+        assert vad.analyze([pcm], SAMPLE_RATE, width, level * 0.9).loud_seconds > 0.9
+        assert vad.analyze([pcm], SAMPLE_RATE, width, level * 1.5).reason == "quiet"
+
+def test_unreadable_sample_width_passes_through():
+    verdict = VoiceActivityDetector().analyze([memoryview(bytes(600))], SAMPLE_RATE, 6, 300)
+    assert verdict.is_speech and verdict.reason == "unchecked"
+
+def test_counters_track_verdicts():
+    vad = VoiceActivityDetector()
+    vad.is_speech([_pcm(_voiced())], SAMPLE_RATE, 2, 300)
+    vad.is_speech([_pcm(np.zeros(SAMPLE_RATE))], SAMPLE_RATE, 2, 300)
+    assert vad.stats() == {"accepted": 1, "rejected": 1, "rejected.quiet": 1}
@@ -0,0 +1,107 @@
+# ==============================================================================
+# File: utils/audio_cache.py
+# Description: Persistent, content-addressed LRU cache for synthesized audio.
+# ==============================================================================
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+class AudioCache:
+    """On-disk audio cache keyed by the full synthesis request, with LRU eviction.
+
+    put() runs on executor threads while get() runs on the event loop, so the index is
+    guarded by a lock.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int, suffix: str = ".mp3"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, voice: str, rate: str, pitch: str, volume: str) -> str:
+        payload = json.dumps([text, voice, rate, pitch, volume], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def _load_index(self):
+        # Rebuild LRU order from mtimes; get() touches files so order survives restarts.
+        files = sorted(self.cache_dir.glob(f"*{self.suffix}"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._entries[path.stem] = size
+            self._total_bytes += size
+        self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path_for(key)
+        with self._lock:
+            if key in self._entries and path.exists():
+                self._entries.move_to_end(key)
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                self.hits += 1
+                return path
+            self._discard(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path_for(key)
+        # Per-thread temporary name, so concurrent puts of one key never share a file.
+        tmp_path = path.with_suffix(f"{path.suffix}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._discard(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+        return path
+
+    def _discard(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the cap.
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+            logging.debug(f"Evicted cached audio {key}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
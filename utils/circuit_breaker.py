@@ -1,6 +1,13 @@
 # ==============================================================================
 # File: utils/circuit_breaker.py
 # ==============================================================================
+import logging
+import time
+from enum import Enum
+from typing import Any, Callable, Type
+
+from core.exceptions import CircuitBreakerOpenError
+
 class CircuitState(Enum):
     CLOSED = "closed"
     OPEN = "open"
@@ -0,0 +1,100 @@
+# ==============================================================================
+# File: utils/deadline.py
+# Description: Per-command deadline budgets, inherited by every awaited stage
+#              through a context variable.
+# ==============================================================================
+import asyncio
+import contextlib
+import contextvars
+import inspect
+import time
+from typing import Awaitable, Optional, TypeVar
+
+from core.exceptions import DeadlineExceededError
+
+T = TypeVar("T")
+
+class Deadline:
+    """An absolute expiry time for one command. Time spent paused is not counted."""
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+        self._paused_at: Optional[float] = None
+        self._pause_depth = 0
+
+    def remaining(self) -> float:
+        now = self._paused_at if self._paused_at is not None else time.monotonic()
+        return max(0.0, self.expires_at - now)
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Stops the clock, e.g. while JARVIS is speaking rather than keeping the user waiting."""
+        if self._pause_depth == 0:
+            self._paused_at = time.monotonic()
+        self._pause_depth += 1
+        try:
+            yield
+        finally:
+            self._pause_depth -= 1
+            if self._pause_depth == 0:
+                self.expires_at += time.monotonic() - self._paused_at
+                self._paused_at = None
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("jarvis_deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float, start: Optional[float] = None):
+    """Sets a deadline `seconds` after `start` (a time.monotonic() reading, default now)."""
+    deadline = Deadline((time.monotonic() if start is None else start) + seconds)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+@contextlib.contextmanager
+def no_deadline():
+    """Runs background work, such as a cache refresh, free of the calling command's budget."""
+    token = _current_deadline.set(None)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+@contextlib.contextmanager
+def deadline_paused():
+    deadline = _current_deadline.get()
+    if deadline is None:
+        yield
+        return
+    with deadline.paused():
+        yield
+
+async def within_deadline(awaitable: Awaitable[T], stage: str) -> T:
+    """Awaits `awaitable`, cancelling it with DeadlineExceededError when the budget runs out."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return await awaitable
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceededError(f"No time left in the command deadline for {stage}.")
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while not task.done():
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"{stage} ran past the command deadline.")
+            # A pause while we wait moves the deadline out, so re-check it rather than time out once.
+            await asyncio.wait((task,), timeout=remaining)
+        # Any error of the stage's own, a TimeoutError included, propagates unchanged.
+        return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.wait((task,))
+            if not task.cancelled():
+                task.exception()
@@ -1,16 +1,31 @@
 # ==============================================================================
 # File: utils/health_monitor.py
 # ==============================================================================
+import logging
+
+from utils.system_sampler import SystemSampler
+
 class HealthMonitor:
     """System health monitoring service."""
+    def __init__(self, sampler: SystemSampler):
+        self.sampler = sampler
+
     async def check_system_health(self) -> dict:
-        cpu = psutil.cpu_percent(interval=1)
-        mem = psutil.virtual_memory()
+        # Reads the background sampler's snapshot, so the event loop never blocks on psutil.
+        latest = self.sampler.latest()
+        if latest is None:
+            return {"is_healthy": True, "sampled": False}
+        averages = self.sampler.averages()
+        cpu = round(averages["cpu_percent"], 1)
+        mem = latest.memory_percent
         health = {
             "cpu_usage_percent": cpu,
-            "memory_usage_percent": mem.percent,
-            "is_healthy": cpu < 90 and mem.percent < 90
+            "memory_usage_percent": mem,
+            "disk_usage_percent": latest.disk_percent,
+            "process_rss_mb": round(latest.process_rss_mb, 1),
+            "is_healthy": cpu < 90 and mem < 90,
+            "sampled": True,
         }
         if not health["is_healthy"]:
-            logging.warning(f"System health alert: CPU={cpu}%, Memory={mem.percent}%")
+            logging.warning(f"System health alert: CPU={cpu}%, Memory={mem}%")
         return health
@@ -0,0 +1,136 @@
+# ==============================================================================
+# File: utils/histogram.py
+# Description: Fixed-memory, log-bucketed latency histograms (HDR-style) with
+#              mergeable snapshots and rolling time windows.
+# ==============================================================================
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+class LogHistogram:
+    """Counts values in logarithmic buckets, so relative error is bounded by `growth`.
+
+    Memory is bounded by the number of buckets between `lowest` and `highest`, no
+    matter how many values are recorded. Histograms with the same layout can be merged.
+    """
+    def __init__(self, lowest: float = 1e-6, highest: float = 3600.0, growth: float = 1.05):
+        self.lowest = lowest
+        self.highest = highest
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.bucket_count = self._index(highest) + 1
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @property
+    def layout(self) -> Tuple[float, float, float]:
+        return self.lowest, self.highest, self.growth
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_growth) + 1
+
+    def _bucket_value(self, index: int) -> float:
+        # Geometric midpoint of the bucket's bounds.
+        if index == 0:
+            return self.lowest
+        return self.lowest * self.growth ** (index - 0.5)
+
+    def record(self, value: float, count: int = 1):
+        index = min(self._index(value), self.bucket_count - 1)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        if other.layout != self.layout:
+            raise ValueError("Cannot merge histograms with different bucket layouts.")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self) -> "LogHistogram":
+        return LogHistogram(*self.layout).merge(self)
+
+    def percentile(self, pct: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Never report beyond what was actually observed.
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+class _Ring:
+    """A fixed number of time slots, each holding the histogram of one slot interval."""
+    def __init__(self, slot_seconds: int, slots: int, layout: Tuple[float, float, float]):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self.layout = layout
+        self._epochs = [-1] * slots
+        self._histograms = [None] * slots
+
+    def record(self, value: float, now: float):
+        epoch = int(now // self.slot_seconds)
+        i = epoch % self.slots
+        if self._epochs[i] != epoch:
+            self._epochs[i] = epoch
+            self._histograms[i] = LogHistogram(*self.layout)
+        self._histograms[i].record(value)
+
+    def snapshot(self, now: float) -> LogHistogram:
+        current = int(now // self.slot_seconds)
+        merged = LogHistogram(*self.layout)
+        for epoch, histogram in zip(self._epochs, self._histograms):
+            if histogram is not None and current - epoch < self.slots:
+                merged.merge(histogram)
+        return merged
+
+class WindowedHistogram:
+    """LogHistogram over the whole uptime plus rolling last-minute and last-hour views."""
+    # window name -> (slot seconds, slot count)
+    WINDOWS = {"1m": (5, 12), "1h": (60, 60)}
+
+    def __init__(self, lowest: float = 1e-6, highest: float = 3600.0, growth: float = 1.05):
+        self.total = LogHistogram(lowest, highest, growth)
+        self._rings = {name: _Ring(*spec, self.total.layout) for name, spec in self.WINDOWS.items()}
+
+    def record(self, value: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self.total.record(value)
+        for ring in self._rings.values():
+            ring.record(value, now)
+
+    def snapshot(self, window: Optional[str] = None, now: Optional[float] = None) -> LogHistogram:
+        """Returns an independent copy: the whole uptime, or the window "1m" or "1h"."""
+        if window is None:
+            return self.total.copy()
+        now = time.monotonic() if now is None else now
+        return self._rings[window].snapshot(now)
@@ -0,0 +1,48 @@
+# ==============================================================================
+# File: utils/http_client.py
+# Description: Shared, application-lifetime HTTP client used by every external
+#              service, so connections, TLS sessions and DNS lookups are reused.
+# ==============================================================================
+import logging
+from typing import Optional
+
+import aiohttp
+
+class HttpClient:
+    """Pooled aiohttp session with keep-alive, DNS caching and per-host limits."""
+    def __init__(self, settings: "HttpSettings"):
+        self.settings = settings
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.settings.pool_size,
+            limit_per_host=self.settings.per_host_limit,
+            ttl_dns_cache=self.settings.dns_cache_ttl,
+            keepalive_timeout=self.settings.keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=self.settings.total_timeout,
+            sock_connect=self.settings.connect_timeout,
+            sock_read=self.settings.read_timeout,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        logging.info("Shared HTTP client started.")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("HTTP client used before start().")
+        return self._session
+
+    def get(self, url: str, **kwargs):
+        """Returns the aiohttp request context manager for a pooled GET."""
+        return self.session.get(url, **kwargs)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logging.info("Shared HTTP client closed.")
@@ -4,6 +4,7 @@
 # ==============================================================================
 import logging
 import sys
+from logging.handlers import RotatingFileHandler
 
 def setup_logging(log_level: str = "INFO", log_dir: str = "logs"):
     """Setup comprehensive logging configuration."""
@@ -2,13 +2,31 @@
 # File: utils/metrics_collector.py
 # ==============================================================================
 from collections import defaultdict
+from typing import Optional
+
+from utils.histogram import LogHistogram, WindowedHistogram
 
 class MetricsCollector:
     """Collects and aggregates application metrics."""
     def __init__(self):
         self.counters = defaultdict(int)
-        self.timers = defaultdict(list)
+        # Fixed-size histograms, so memory stays flat however long JARVIS runs.
+        self.timers = defaultdict(WindowedHistogram)
 
     def record_command_processing(self, intent: str, duration: float, success: bool):
         self.counters[f"commands.processed.{intent}.{'success' if success else 'failure'}"] += 1
-        self.timers[f"commands.duration.{intent}"].append(duration)
+        self.timers[f"commands.duration.{intent}"].record(duration)
+
+    def timer_summary(self, name: str, window: Optional[str] = None) -> dict:
+        """p50/p90/p99/max for one timer, over the whole uptime or the window "1m" or "1h"."""
+        timer = self.timers.get(name)
+        if timer is None:
+            # Looking up a timer must not create an empty one that then shows in every snapshot.
+            return LogHistogram().summary()
+        return timer.snapshot(window).summary()
+
+    def snapshot(self, window: Optional[str] = None) -> dict:
+        return {
+            "counters": dict(self.counters),
+            "timers": {name: timer.snapshot(window).summary() for name, timer in self.timers.items()},
+        }
@@ -1,14 +1,62 @@
+# ==============================================================================
+# File: utils/rate_limiter.py
+# ==============================================================================
+import asyncio
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
 class RateLimiter:
-    """Token bucket rate limiter."""
-    def __init__(self, max_calls: int, time_window: int):
-        self.max_calls = max_calls
-        self.time_window = time_window
-        self.calls = []
-
-    async def allow_request(self) -> bool:
-        now = time.time()
-        self.calls = [t for t in self.calls if now - t < self.time_window]
-        if len(self.calls) < self.max_calls:
-            self.calls.append(now)
+    """Token bucket rate limiter with an independent bucket per key.
+
+    Each bucket is two numbers, so every call is O(1). A bucket holds up to `burst`
+    tokens (default `max_calls`) and refills at max_calls / time_window tokens per second.
+    """
+    def __init__(self, max_calls: int, time_window: float, burst: Optional[int] = None):
+        self.default_limit = (max_calls / time_window, burst or max_calls)
+        self._limits: Dict[Hashable, Tuple[float, int]] = {}
+        # key -> [tokens, last refill time]; tokens go negative while callers wait in acquire().
+        self._buckets: Dict[Hashable, list] = {}
+
+    def set_limit(self, key: Hashable, max_calls: int, time_window: float, burst: Optional[int] = None):
+        self._limits[key] = (max_calls / time_window, burst or max_calls)
+        self._buckets.pop(key, None)
+
+    def _refill(self, key: Hashable) -> Tuple[list, float]:
+        rate, capacity = self._limits.get(key, self.default_limit)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(capacity), now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket, rate
+
+    def available(self, key: Hashable = "default") -> float:
+        """Tokens in the bucket right now, without taking any."""
+        bucket, _ = self._refill(key)
+        return bucket[0]
+
+    async def allow_request(self, key: Hashable = "default") -> bool:
+        """Takes a token if one is available right now, without waiting."""
+        bucket, _ = self._refill(key)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
             return True
         return False
+
+    async def acquire(self, key: Hashable = "default", max_wait: Optional[float] = None) -> bool:
+        """Waits for a token. Returns False, taking nothing, if that would exceed max_wait."""
+        bucket, rate = self._refill(key)
+        wait = (1 - bucket[0]) / rate if bucket[0] < 1 else 0.0
+        if max_wait is not None and wait > max_wait:
+            return False
+        # Reserve the token now, so concurrent callers queue up behind each other in order.
+        bucket[0] -= 1
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                bucket[0] += 1
+                raise
+        return True
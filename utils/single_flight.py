@@ -0,0 +1,42 @@
+# ==============================================================================
+# File: utils/single_flight.py
+# Description: Request coalescing for concurrent identical async calls.
+# ==============================================================================
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils.tracing import no_trace
+
+class SingleFlight:
+    """Collapses concurrent calls sharing a key into one upstream call.
+
+    Every caller gets the same result or exception. The shared call runs in its own
+    task, so one caller being cancelled does not cancel it for the others.
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # The shared call serves every waiter, so it must not record into the first one's trace.
+            with no_trace():
+                task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
@@ -0,0 +1,28 @@
+# ==============================================================================
+# File: utils/speculation.py
+# Description: Work started from a partial transcript, to be confirmed or
+#              cancelled once the final transcript is known.
+# ==============================================================================
+import asyncio
+import logging
+from typing import Any, Dict
+
+class Speculation:
+    """A response being prepared for an intent read from a partial transcript."""
+    def __init__(self, intent: str, entities: Dict[str, Any], task: asyncio.Task):
+        self.intent = intent
+        self.entities = entities
+        self.task = task
+        task.add_done_callback(self._retrieve)
+
+    def matches(self, intent: str, entities: Dict[str, Any]) -> bool:
+        return self.intent == intent and self.entities == entities
+
+    def cancel(self):
+        self.task.cancel()
+
+    @staticmethod
+    def _retrieve(task: asyncio.Task):
+        # A speculation nobody confirms still must not leave an unretrieved exception behind.
+        if not task.cancelled() and task.exception() is not None:
+            logging.debug(f"Speculative work failed: {task.exception()}")
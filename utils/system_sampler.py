@@ -0,0 +1,107 @@
+# ==============================================================================
+# File: utils/system_sampler.py
+# Description: Background sampler that keeps recent CPU, memory, disk and
+#              process statistics in a ring buffer for O(1) non-blocking reads.
+# ==============================================================================
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import psutil
+
+@dataclass
+class SystemSample:
+    timestamp: float
+    cpu_percent: float
+    memory_percent: float
+    disk_percent: float
+    process_cpu_percent: float
+    process_rss_mb: float
+    process_threads: int
+
+_AVERAGED = [f.name for f in fields(SystemSample) if f.name != "timestamp"]
+
+class SystemSampler:
+    """Samples system stats on a daemon thread; readers never call psutil themselves.
+
+    psutil's interval-less cpu_percent() reports usage since the previous call, so
+    sampling at a steady rate gives meaningful values without ever sleeping in a reader.
+    """
+    def __init__(self, interval: float = 1.0, window: int = 60, disk_path: Optional[str] = None):
+        self.interval = interval
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self._samples = deque(maxlen=window)
+        self._sums = dict.fromkeys(_AVERAGED, 0.0)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = psutil.Process()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="jarvis-system-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        # Prime the CPU counters; the first real sample follows shortly after.
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        delay = min(self.interval, 0.1)
+        while not self._stop.wait(delay):
+            try:
+                self._record(self._sample())
+            except Exception as e:
+                logging.warning(f"System sampling failed: {e}")
+            delay = self.interval
+
+    def _sample(self) -> SystemSample:
+        with self._process.oneshot():
+            process_cpu = self._process.cpu_percent(interval=None)
+            rss = self._process.memory_info().rss / (1024 * 1024)
+            threads = self._process.num_threads()
+        return SystemSample(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=psutil.virtual_memory().percent,
+            disk_percent=psutil.disk_usage(self.disk_path).percent,
+            process_cpu_percent=process_cpu,
+            process_rss_mb=rss,
+            process_threads=threads,
+        )
+
+    def _record(self, sample: SystemSample):
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                evicted = self._samples[0]
+                for name in _AVERAGED:
+                    self._sums[name] -= getattr(evicted, name)
+            self._samples.append(sample)
+            for name in _AVERAGED:
+                self._sums[name] += getattr(sample, name)
+        self._ready.set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the first sample exists; only for callers that start very early."""
+        return self._ready.wait(timeout)
+
+    def latest(self) -> Optional[SystemSample]:
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def averages(self) -> dict:
+        """Rolling means over the ring buffer, kept as running sums."""
+        with self._lock:
+            n = len(self._samples)
+            return {name: total / n for name, total in self._sums.items()} if n else {}
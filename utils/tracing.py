@@ -0,0 +1,120 @@
+# ==============================================================================
+# File: utils/tracing.py
+# Description: Lightweight span tracing for per-command stage latency, written
+#              as JSON lines to a rotating trace file.
+# ==============================================================================
+import contextlib
+import contextvars
+import json
+import logging
+import random
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("jarvis_trace", default=None)
+_NOOP_SPAN = contextlib.nullcontext()
+
+class Trace:
+    """A sampled command: a correlation ID plus the timed stages it went through."""
+    def __init__(self, name: str, attrs: dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = 0.0
+        self.spans = []
+
+    def add_span(self, name: str, start: float, duration: float, **attrs):
+        """Records a stage; `start` is a time.perf_counter() reading."""
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._t0) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **attrs,
+        })
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._t0
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "spans": self.spans,
+        }
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "start")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.add_span(self.name, self.start, time.perf_counter() - self.start, **self.attrs)
+        return False
+
+def span(name: str, **attrs):
+    """Times a stage of the current trace; a shared no-op when nothing is being traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextlib.contextmanager
+def no_trace():
+    """Detaches work from the current trace, e.g. before starting a task that outlives the command."""
+    token = _current_trace.set(None)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+class Tracer:
+    """Starts sampled traces and writes finished ones to a rotating JSON-lines file."""
+    def __init__(self, settings: "TracingSettings"):
+        self.settings = settings
+        self._logger = None
+        if settings.enabled:
+            path = Path(settings.path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._logger = logging.getLogger("jarvis.trace")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            # The logger is process-wide: a second Tracer must not write every trace twice.
+            if not any(getattr(h, "baseFilename", None) == str(path.resolve()) for h in self._logger.handlers):
+                handler = RotatingFileHandler(path, maxBytes=settings.max_bytes, backupCount=settings.backup_count)
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._logger.addHandler(handler)
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attrs):
+        """Yields a Trace when this call is sampled, otherwise None."""
+        if self._logger is None or random.random() >= self.settings.sample_rate:
+            yield None
+            return
+        trace = Trace(name, attrs)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            self._logger.info(json.dumps(trace.to_dict()))